@@ -1,281 +1,1323 @@
 from pylab import *
-from scipy import interpolate
 import re
 import os
 import numpy
 import sqlite3
 import csv
+import json
+import hashlib
+import TimeSeries
+
+# Bump when the layout of the binary column cache changes so stale sidecars get rebuilt
+COLUMN_CACHE_VERSION = 4
+
+# Rows parsed per chunk when streaming a csv file
+CSV_CHUNK_ROWS = 50000
+
+# Bytes read at a time when a csv file is read line by line from an offset
+CSV_CHUNK_BYTES = 16 * 1024 ** 2
+
+# Rows kept as interpolation knots when a file is too large to load in full
+STREAMED_MAX_ROWS = 200000
+
+
+class ColumnData(dict):
+
+    """
+    The columns of a csv file keyed by column name, along with the [min, max] of the columns whose extremes were
+    recorded while the file was loaded
+
+    :type extremes: dict[str, list[float]]
+    """
+
+    def __init__(self, columns=(), extremes=None):
+
+        super(ColumnData, self).__init__(columns)
+
+        if extremes is None:
+
+            extremes = {}
+
+        self.extremes = extremes
+
+
+def computeExtremes(columns):
+
+    """
+    [min, max] of every numeric column that has at least one value
+
+    :type columns: dict[str, numpy.ndarray]
+    :rtype: dict[str, list[float]]
+    """
+
+    extremes = {}
+
+    for column in columns:
+
+        values = columns[column]
+
+        if values.dtype == numpy.float64 and len(values) > 0 and not numpy.isnan(values).all():
+
+            extremes[column] = [ float(numpy.nanmin(values)), float(numpy.nanmax(values)) ]
+
+    return extremes
+
+
+def mergeExtremes(extremes, new_extremes):
+
+    """
+    Widen the extremes in place to cover new_extremes
+
+    :type extremes: dict[str, list[float]]
+    :type new_extremes: dict[str, list[float]]
+    """
+
+    for column in new_extremes:
+
+        [new_min, new_max] = new_extremes[column]
+
+        if column in extremes:
+
+            [current_min, current_max] = extremes[column]
+            extremes[column] = [ min(current_min, new_min), max(current_max, new_max) ]
+
+        else:
+
+            extremes[column] = [ new_min, new_max ]
+
+
+def readCSVHeader(csv_file):
+
+    """
+    The whitespace stripped, non empty column names of a csv file in file order
+
+    :type csv_file: str
+    :rtype: list[str]
+    """
+
+    with open(csv_file, 'r') as csv_file_object:
+
+        csv_reader = csv.reader(csv_file_object, delimiter=',')
+        headers = next(csv_reader, [])
+
+    return [ header.strip() for header in headers if header.strip() != "" ]
+
+
+def readCSVChunks(csv_file, columns=None, chunk_rows=CSV_CHUNK_ROWS, schema=None, report=None):
+
+    """
+    Stream a csv file as a sequence of dictionaries holding at most chunk_rows rows of each column, parsed the same
+    way as readCSVColumns. Only one chunk of text is held in memory at a time. The malformed cells of all the chunks
+    are reported once the file has been read, unless a report is passed in to collect them.
+
+    :type csv_file: str
+    :type columns: list[str] | None
+    :type chunk_rows: int
+    :type schema: Schemas.FileSchema | None
+    :type report: MalformedValueReport | None
+    :rtype: collections.Iterable[dict[str, numpy.ndarray]]
+    """
+
+    print_report = report is None
+
+    if print_report:
+
+        report = MalformedValueReport()
+
+    with open(csv_file, 'r') as csv_file_object:
+
+        csv_reader = csv.reader(csv_file_object, delimiter=',')
+        headers = next(csv_reader, [])
+
+        if schema is not None:
+
+            schema.checkRequiredColumns([ header.strip() for header in headers ], csv_file)
+
+        # only hold on to the cells of the columns we want
+        selected = selectColumns(headers, columns)
+        number_rows = 0
+        first_row = 0
+
+        for row in csv_reader:
+
+            if not row:
+
+                continue
+
+            row_length = len(row)
+
+            for column_index, column, raw_values in selected:
+
+                raw_values.append(row[column_index] if column_index < row_length else "")
+
+            number_rows += 1
+
+            if number_rows == chunk_rows:
+
+                yield parseChunk(selected, schema, csv_file, first_row, report)
+                first_row += number_rows
+                number_rows = 0
+
+        if number_rows > 0:
+
+            yield parseChunk(selected, schema, csv_file, first_row, report)
+
+    if print_report:
+
+        report.printReport()
+
+
+def getColumnIndex(headers):
+
+    """
+    Position of every column keyed by its name without the surrounding whitespace some files put in their headers, so
+    rows can be looked up with the canonical names directly
+
+    :type headers: list[str]
+    :rtype: dict[str, int]
+    """
+
+    return dict( (headers[column_index].strip(), column_index) for column_index in range(len(headers)) )
+
+
+def selectColumns(headers, columns=None):
+
+    """
+    [ column index, stripped column name, empty cell list ] for the named columns of a header row that are wanted
+
+    :type headers: list[str]
+    :type columns: list[str] | None
+    :rtype: list[list]
+    """
+
+    if columns is not None:
+
+        columns = set( column.strip() for column in columns )
+
+    selected = []
+
+    for column_index in range(len(headers)):
+
+        column = headers[column_index].strip()
+
+        if column != "" and (columns is None or column in columns):
+
+            selected.append([column_index, column, []])
+
+    return selected
+
+
+def parseChunk(selected, schema=None, location=None, first_row=0, report=None):
+
+    """
+    Parse the cells collected by selectColumns into arrays of the schema's types. location and first_row place the
+    chunk in its file for the malformed cell report, see parseColumn.
+    """
+
+    chunk = {}
+
+    for selected_column in selected:
+
+        column = selected_column[1]
+
+        if schema is None:
+
+            chunk[column] = parseColumn(selected_column[2])
+
+        else:
+
+            chunk[column] = parseColumn(selected_column[2], schema.getDtype(column), schema.fill_value, [location, column, first_row], report)
+
+        selected_column[2] = []
+
+    return chunk
+
+
+def readCSVColumns(csv_file, columns=None, schema=None):
+
+    """
+    Parse a csv file once into a dictionary of numpy arrays keyed by the whitespace stripped column name.
+    Numeric columns are stored as float64 with unparseable cells set to nan, columns without any numeric
+    cell are kept as string arrays and columns without a header name are dropped. If columns is given only
+    those columns are parsed and stored. With a schema the columns are parsed into its types and the file must have
+    its required columns. The extremes of the numeric columns are recorded along the way.
+
+    :type csv_file: str
+    :type columns: list[str] | None
+    :type schema: Schemas.FileSchema | None
+    :rtype: ColumnData
+    """
+
+    chunks = {}
+
+    for chunk in readCSVChunks(csv_file, columns, schema=schema):
+
+        for column in chunk:
+
+            chunks.setdefault(column, []).append(chunk[column])
+
+    parsed_columns = {}
+
+    for column in chunks:
+
+        parsed_columns[column] = concatenateChunks(chunks[column])
+
+    return ColumnData(parsed_columns, computeExtremes(parsed_columns))
+
+
+def readCSVLineChunks(csv_file, offset=0, chunk_bytes=CSV_CHUNK_BYTES):
+
+    """
+    The header and the complete rows of a csv file that start at or after the byte offset, read about chunk_bytes at a
+    time. Each chunk comes with the offset just past its last row, a row the writer hasn't finished yet is left for the
+    next read. A file without a complete header yields a single empty chunk.
+
+    :type csv_file: str
+    :type offset: int
+    :type chunk_bytes: int
+    :rtype: collections.Iterable[list[list[str], list[list[str]], int]]
+    """
+
+    with open(csv_file, 'rb') as csv_file_object:
+
+        header_line = csv_file_object.readline()
+
+        if not header_line.endswith(b"\n"):
+
+            yield [ [], [], 0 ]
+            return
+
+        headers = next(csv.reader([header_line.decode()]))
+
+        offset = max(offset, csv_file_object.tell())
+        csv_file_object.seek(offset)
+
+        # the bytes after the last complete row read so far
+        pending = b""
+
+        while True:
+
+            new_data = csv_file_object.read(chunk_bytes)
+            data = pending + new_data
+
+            end = data.rfind(b"\n") + 1
+            pending = data[end:]
+            offset += end
+
+            yield [ headers, [ row for row in csv.reader(data[:end].decode().splitlines()) if row ], offset ]
+
+            if not new_data:
+
+                return
+
+
+def readCSVLines(csv_file, offset=0):
+
+    """
+    The header and the complete rows of a csv file that start at or after the byte offset, along with the offset just
+    past the last complete row. A row the writer hasn't finished yet is left for the next read.
+
+    :type csv_file: str
+    :type offset: int
+    :rtype: list[list[str], list[list[str]], int]
+    """
+
+    rows = []
+
+    for [headers, chunk_rows, new_offset] in readCSVLineChunks(csv_file, offset):
+
+        rows += chunk_rows
+
+    return [ headers, rows, new_offset ]
+
+
+def getCSVSignature(csv_file, offset):
+
+    """
+    A hash of the header, the first row and the bytes just before offset of a csv file. Rows appended past offset leave
+    it as it was, a rewritten file doesn't.
+
+    :type csv_file: str
+    :type offset: int
+    :rtype: str | None
+    :return: None if the file is shorter than offset
+    """
+
+    with open(csv_file, 'rb') as csv_file_object:
+
+        if csv_file_object.seek(0, os.SEEK_END) < offset:
+
+            return None
+
+        csv_file_object.seek(0)
+        first_lines = csv_file_object.read(min(offset, 65536)).split(b"\n")[:2]
+
+        tail_start = csv_file_object.seek(max(0, offset - 4096))
+        tail = csv_file_object.read(offset - tail_start)
+
+    return hashlib.sha1(b"\n".join(first_lines) + b"\0" + tail).hexdigest()
+
+
+def readCSVTail(csv_file, offset=0, columns=None, schema=None, report=None):
+
+    """
+    Parse the complete rows of a csv file past the byte offset into columns, used to follow files that are still being
+    written. Returns the columns and the offset to continue from. A report passed in collects the malformed cells
+    across the reads of the file, otherwise they're printed right away.
+
+    :type csv_file: str
+    :type offset: int
+    :type columns: list[str] | None
+    :type schema: Schemas.FileSchema | None
+    :type report: MalformedValueReport | None
+    :rtype: list[ColumnData, int]
+    """
+
+    [headers, rows, new_offset] = readCSVLines(csv_file, offset)
+
+    if schema is not None and headers:
+
+        schema.checkRequiredColumns([ header.strip() for header in headers ], csv_file)
+
+    selected = selectColumns(headers, columns)
+
+    for row in rows:
+
+        row_length = len(row)
+
+        for column_index, column, raw_values in selected:
+
+            raw_values.append(row[column_index] if column_index < row_length else "")
+
+    new_columns = parseChunk(selected, schema, csv_file + " past byte %d" % offset, 0, report)
+
+    return [ ColumnData(new_columns, computeExtremes(new_columns)), new_offset ]
+
+
+def concatenateChunks(chunks):
+
+    """
+    Join the chunks of one column, a chunk that had no numeric cells in an otherwise numeric column becomes nan
+
+    :type chunks: list[numpy.ndarray]
+    :rtype: numpy.ndarray
+    """
+
+    if any([ chunk.dtype == numpy.float64 for chunk in chunks ]):
+
+        chunks = [ chunk if chunk.dtype == numpy.float64 else numpy.full(len(chunk), numpy.nan) for chunk in chunks ]
+
+    return numpy.concatenate(chunks)
+
+
+class IncrementalColumnBuilder(object):
+
+    """
+    Builds bounded size columns from a stream of chunks: keeps every stride-th row as interpolation knots (doubling the
+    stride whenever more than max_rows are kept), always keeps the last row and tracks the exact per column extremes.
+
+    :type extremes: dict[str, list[float]]
+    """
+
+    def __init__(self, max_rows=STREAMED_MAX_ROWS):
+
+        self._max_rows = max_rows
+        self._stride = 1
+        self._number_rows = 0
+        self._kept_chunks = {}
+        self._number_kept = 0
+        self._last_row = {}
+        self.extremes = {}
+
+    def addChunk(self, chunk):
+
+        chunk_length = len(next(iter(chunk.values())))
+
+        if chunk_length == 0:
+
+            return
+
+        # rows with a global index that is a multiple of the stride
+        kept_indexes = numpy.arange((-self._number_rows) % self._stride, chunk_length, self._stride)
+
+        for column in chunk:
+
+            values = chunk[column]
+            self._kept_chunks.setdefault(column, []).append(values[kept_indexes])
+            self._last_row[column] = values[-1:]
+
+        mergeExtremes(self.extremes, computeExtremes(chunk))
+
+        self._number_rows += chunk_length
+        self._number_kept += len(kept_indexes)
+
+        while self._number_kept > self._max_rows:
+
+            self._thin()
+
+    def _thin(self):
+
+        # the kept rows sit on multiples of the stride starting at row 0, so every other one sits on twice the stride
+        for column in self._kept_chunks:
+
+            self._kept_chunks[column] = [ concatenateChunks(self._kept_chunks[column])[::2] ]
+
+        self._stride *= 2
+        self._number_kept = len(next(iter(self._kept_chunks.values()))[0])
+
+    def getColumns(self):
+
+        """
+        :rtype: dict[str, numpy.ndarray]
+        """
+
+        columns = {}
+
+        for column in self._kept_chunks:
+
+            kept_chunks = self._kept_chunks[column]
+
+            # make sure the ending time of the run survives the downsampling
+            if (self._number_rows - 1) % self._stride != 0:
+
+                kept_chunks = kept_chunks + [ self._last_row[column] ]
+
+            columns[column] = concatenateChunks(kept_chunks)
+
+        return columns
+
+
+def streamCSVColumns(csv_file, columns=None, max_rows=STREAMED_MAX_ROWS, chunk_rows=CSV_CHUNK_ROWS, schema=None):
+
+    """
+    Load a csv file too large to hold in memory as downsampled columns along with the exact extremes of every column
+
+    :rtype: ColumnData
+    """
+
+    builder = IncrementalColumnBuilder(max_rows)
+
+    for chunk in readCSVChunks(csv_file, columns, chunk_rows, schema):
+
+        builder.addChunk(chunk)
+
+    return ColumnData(builder.getColumns(), builder.extremes)
+
+
+def loadCSVColumns(csv_file, use_cache=True, columns=None, schema=None):
+
+    """
+    Load the columns of a csv file, reusing the binary sidecar cache next to it when it still matches the
+    source file size and modification time. Columns the cache doesn't hold yet are parsed from the text and
+    added to it. If columns is given only those columns are loaded.
+
+    :type csv_file: str
+    :type use_cache: bool
+    :type columns: list[str] | None
+    :type schema: Schemas.FileSchema | None
+    :rtype: ColumnData
+    """
+
+    header = readCSVHeader(csv_file)
+
+    if schema is not None:
+
+        schema.checkRequiredColumns(header, csv_file)
+
+    if columns is None:
+
+        wanted_columns = header
+
+    else:
+
+        requested_columns = set( column.strip() for column in columns )
+        wanted_columns = [ column for column in header if column in requested_columns ]
+
+    loaded_columns = None
+
+    if use_cache:
+
+        loaded_columns = readColumnCache(csv_file)
+
+    if loaded_columns is None:
+
+        loaded_columns = ColumnData()
+
+    missing_columns = [ column for column in wanted_columns if not column in loaded_columns ]
+
+    if missing_columns:
+
+        parsed_columns = readCSVColumns(csv_file, missing_columns, schema)
+        loaded_columns.update(parsed_columns)
+        loaded_columns.extremes.update(parsed_columns.extremes)
+
+        if use_cache:
+
+            writeColumnCache(csv_file, loaded_columns)
+
+    extremes = dict( (column, loaded_columns.extremes[column]) for column in wanted_columns if column in loaded_columns.extremes )
+
+    return ColumnData(( (column, loaded_columns[column]) for column in wanted_columns ), extremes)
+
+
+def getColumnCachePaths(csv_file):
+
+    return [ csv_file + ".cache.npy", csv_file + ".cache.json" ]
+
+
+def getSourceSignature(csv_file):
+
+    file_stat = os.stat(csv_file)
+    return { "size" : file_stat.st_size, "mtime" : file_stat.st_mtime_ns }
+
+
+def readColumnCache(csv_file):
+
+    """
+    Open the binary sidecar of a csv file. Numeric columns come back as read only views into a memory mapped
+    (column x row) matrix, along with the extremes recorded when they were parsed. Returns None if there is no usable
+    cache.
+
+    :type csv_file: str
+    :rtype: ColumnData | None
+    """
+
+    metadata = readColumnCacheMetadata(csv_file)
+
+    if metadata is None or not metadata["matrix"]:
+
+        return None
+
+    try:
+
+        matrix = numpy.load(getColumnCachePaths(csv_file)[0], mmap_mode='r')
+
+    except (ValueError, OSError):
+
+        return None
+
+    numeric_columns = metadata["numeric_columns"]
+
+    if matrix.shape != (len(numeric_columns), metadata["rows"]):
+
+        return None
+
+    numeric_index = dict(zip(numeric_columns, range(len(numeric_columns))))
+    columns = {}
+
+    for column in metadata["columns"]:
+
+        if column in numeric_index:
+
+            columns[column] = numpy.asarray(matrix[numeric_index[column]])
+
+        else:
+
+            columns[column] = numpy.array(metadata["string_columns"][column])
+
+    return ColumnData(columns, metadata["extremes"])
+
+
+def readColumnCacheMetadata(csv_file):
+
+    """
+    The metadata of the binary sidecar of a csv file if it's there and still matches the file, None otherwise. The
+    metadata of a streamed file has no matrix next to it, only the extremes of its columns.
+
+    :type csv_file: str
+    :rtype: dict | None
+    """
+
+    [matrix_path, metadata_path] = getColumnCachePaths(csv_file)
+
+    if not os.path.isfile(metadata_path):
+
+        return None
+
+    try:
+
+        with open(metadata_path, 'r') as metadata_file:
+
+            metadata = json.load(metadata_file)
+
+        if metadata["version"] != COLUMN_CACHE_VERSION or metadata["source"] != getSourceSignature(csv_file):
+
+            return None
+
+        if metadata["matrix"] and not os.path.isfile(matrix_path):
+
+            return None
+
+    except (ValueError, KeyError, OSError):
+
+        return None
+
+    return metadata
+
+
+def readCachedExtremes(csv_file):
+
+    """
+    The extremes of every column of a csv file straight from its cache metadata without touching the data, None unless
+    the cache holds all the columns of the file
+
+    :type csv_file: str
+    :rtype: dict[str, list[float]] | None
+    """
+
+    metadata = readColumnCacheMetadata(csv_file)
+
+    if metadata is None or not set(readCSVHeader(csv_file)).issubset(metadata["columns"]):
+
+        return None
+
+    return metadata["extremes"]
+
+
+def writeColumnCache(csv_file, columns):
+
+    """
+    Write the parsed columns of a csv file to its binary sidecar. The metadata file is written last so a partially
+    written cache is never picked up.
+
+    :type csv_file: str
+    :type columns: ColumnData
+    """
+
+    [matrix_path, metadata_path] = getColumnCachePaths(csv_file)
+
+    numeric_columns = [ column for column in columns if columns[column].dtype == numpy.float64 ]
+    string_columns = dict( (column, columns[column].tolist()) for column in columns if not column in numeric_columns )
+    rows = len(next(iter(columns.values()))) if columns else 0
+
+    metadata = {
+        "version" : COLUMN_CACHE_VERSION,
+        "source" : getSourceSignature(csv_file),
+        "matrix" : True,
+        "rows" : rows,
+        "columns" : list(columns),
+        "numeric_columns" : numeric_columns,
+        "string_columns" : string_columns,
+        "extremes" : columns.extremes
+    }
+
+    matrix = numpy.empty((len(numeric_columns), rows), dtype=numpy.float64)
+
+    for index in range(len(numeric_columns)):
+
+        matrix[index] = columns[numeric_columns[index]]
+
+    try:
+
+        with open(matrix_path + ".tmp", 'wb') as matrix_file:
+
+            numpy.save(matrix_file, matrix)
+
+        os.replace(matrix_path + ".tmp", matrix_path)
+
+        writeColumnCacheMetadata(csv_file, metadata)
+
+    except OSError as error:
+
+        print("Couldn't write column cache for " + csv_file + ": " + str(error))
+
+
+def writeColumnCacheMetadata(csv_file, metadata):
+
+    metadata_path = getColumnCachePaths(csv_file)[1]
+
+    with open(metadata_path + ".tmp", 'w') as metadata_file:
+
+        json.dump(metadata, metadata_file)
+
+    os.replace(metadata_path + ".tmp", metadata_path)
+
+
+def writeStreamedExtremes(csv_file, columns):
+
+    """
+    Record the exact extremes of streamed columns in the cache metadata of a csv file without writing a matrix, so later
+    sessions get them from readCachedExtremes instead of streaming the file again
+
+    :type csv_file: str
+    :type columns: ColumnData
+    """
+
+    metadata = readColumnCacheMetadata(csv_file)
+
+    # a full cache already holds the extremes of its columns
+    if metadata is not None and metadata["matrix"]:
+
+        return
+
+    if metadata is None:
+
+        metadata = {
+            "version" : COLUMN_CACHE_VERSION,
+            "source" : getSourceSignature(csv_file),
+            "matrix" : False,
+            "rows" : 0,
+            "columns" : [],
+            "numeric_columns" : [],
+            "string_columns" : {},
+            "extremes" : {}
+        }
+
+    metadata["columns"] += [ column for column in columns.extremes if not column in metadata["columns"] ]
+    metadata["extremes"].update(columns.extremes)
+
+    try:
+
+        writeColumnCacheMetadata(csv_file, metadata)
+
+    except OSError as error:
+
+        print("Couldn't write column cache for " + csv_file + ": " + str(error))
+
+
+def parseColumn(raw_values, dtype=None, fill_value=numpy.nan, location=None, report=None):
+
+    """
+    Convert a list of csv cells into an array of dtype in one pass. Numeric cells that can't be parsed are replaced by
+    fill_value and reported along with where they are, location being [ file, column, index of the first row ]. They
+    go into report when it's given, so a file parsed in chunks is reported once, and are printed right away otherwise.
+    Without a dtype the column is read as float64, or kept as strings if none of its cells are numbers.
+
+    :type raw_values: list[str]
+    :type dtype: type | None
+    :type fill_value: float
+    :type location: list | None
+    :type report: MalformedValueReport | None
+    :rtype: numpy.ndarray
+    """
+
+    if dtype is str:
+
+        return numpy.array(raw_values, dtype=str)
+
+    try:
+
+        return numpy.array(raw_values, dtype=numpy.float64)
+
+    except ValueError:
+
+        pass
+
+    values = numpy.empty(len(raw_values), dtype=numpy.float64)
+    malformed_rows = []
+
+    for index in range(len(raw_values)):
+
+        try:
+
+            values[index] = float(raw_values[index])
+
+        except ValueError:
+
+            values[index] = fill_value
+            malformed_rows.append(index)
+
+    if dtype is None and len(malformed_rows) == len(raw_values):
+
+        return numpy.array(raw_values)
+
+    if location is not None:
+
+        [csv_file, column, first_row] = location
+        first_malformed = malformed_rows[0]
+
+        print_report = report is None
+
+        if print_report:
+
+            report = MalformedValueReport()
+
+        report.addMalformed(csv_file, column, len(malformed_rows), raw_values[first_malformed], first_row + first_malformed + 1)
+
+        if print_report:
+
+            report.printReport()
+
+    return values
+
+
+class MalformedValueReport(object):
+
+    """
+    The cells parseColumn couldn't parse, counted per column across the chunks and reads of a file along with the
+    first of them. printReport prints each column once, the first time it has malformed cells.
+
+    :type columns: dict[str, list]
+    """
+
+    def __init__(self):
+
+        # [ file, number of malformed cells, first malformed cell, its data row ] keyed by column
+        self.columns = {}
+        self._reported_columns = set()
+
+    def addMalformed(self, csv_file, column, number_malformed, first_value, first_row):
+
+        if column in self.columns:
+
+            self.columns[column][1] += number_malformed
+
+        else:
+
+            self.columns[column] = [csv_file, number_malformed, first_value, first_row]
+
+    def printReport(self):
+
+        for column in self.columns:
+
+            if not column in self._reported_columns:
+
+                [csv_file, number_malformed, first_value, first_row] = self.columns[column]
+
+                print("%d malformed values in column %s of %s, the first is '%s' on data row %d"
+                      % (number_malformed, column, csv_file, first_value, first_row))
+
+                self._reported_columns.add(column)
 
 
 class CSVDataObject(object):
 
     """
     :type keys: list[str]
-    :type csv_data: list[ { str:str  } ]
+    :type csv_data: dict[str, numpy.ndarray]
+    :type extremes: dict[str, list[float]]
     """
 
     def __init__(self, csv_data ):
 
-        row = csv_data[0]
-        self.keys = [ key for key in row ]
+        self.keys = [ key for key in csv_data ]
         self.csv_data = csv_data
 
+        # extremes recorded at load time are exact even if the columns were downsampled
+        if isinstance(csv_data, ColumnData):
+
+            self.extremes = dict(csv_data.extremes)
+
+        else:
+
+            self.extremes = {}
+
     def getColumnData(self, column):
 
-        data_list = []
+        return self.csv_data[column.strip()]
 
-        for row in self.csv_data:
+    def hasColumn(self, column):
 
-            data = row[column]
-            data_list.append(data)
+        return column.strip() in self.csv_data
 
-        return data_list
+    def getColumnExtremes(self, column):
 
-class TimeBasedCSVDataObject(CSVDataObject):
+        column = column.strip()
 
-    def __init__(self, csv_data, time_column ):
+        if not column in self.extremes:
 
-        super(TimeBasedCSVDataObject, self).__init__(csv_data)
-        self.time_column = time_column
+            values = self.getColumnData(column)
+            self.extremes[column] = [ float(numpy.nanmin(values)), float(numpy.nanmax(values)) ]
 
-        self._interpolate_function = {}
-        for column in self.keys:
+        return self.extremes[column]
 
-            self._interpolate_function[column] = False
+    def addColumn(self, column, values):
 
-    def getInterpolatedDataTimeSeries(self, time_array, column):
+        if not column in self.csv_data:
 
+            self.keys.append(column)
 
-        if self._interpolate_function[column] == False:
+        self.csv_data[column] = values
 
-            raw_time, raw_value = self.getRawDataTimeSeries(column)
+    def extendColumn(self, column, values):
 
-            record_time = [0] + raw_time + [1e100]
-            record_value = [raw_value[0]] + raw_value + [raw_value[-1]]
+        # always build a new array so views handed out earlier keep their contents
+        self.csv_data[column] = concatenateChunks([ self.csv_data[column], values ])
 
-            self._interpolate_function[column] = interpolate.interp1d(record_time, record_value)
+        # columns without recorded extremes get them computed over all their rows when asked for
+        if column in self.extremes:
 
-        interpolated_values = self._interpolate_function[column](time_array)
+            mergeExtremes(self.extremes, computeExtremes({ column : values }))
 
+    def appendRows(self, new_columns):
 
+        """
+        Add rows read from the end of a file that is still being written to the loaded columns
 
-        return interpolated_values
+        :type new_columns: dict[str, numpy.ndarray]
+        """
 
-    def getRawDataTimeSeries(self, column):
+        for column in new_columns:
 
-        time_array = [ float(time) for time in self.getColumnData(self.time_column)]
+            if column in self.csv_data:
 
-        value_array = []
+                self.extendColumn(column, new_columns[column])
 
-        for value in self.getColumnData(column): #type: str
+class TimeBasedCSVDataObject(CSVDataObject):
 
-            try:
+    """
+    :type _time_series: TimeSeries.TimeSeries
+    """
 
-                value_array.append(float(value))
+    def __init__(self, csv_data, time_column, schema=None ):
 
-            except:
+        """
+        :type schema: Schemas.FileSchema | None
+        :param schema: picks the interpolation mode of each column, linear for all of them without one
+        """
 
-                value_array.append(0.0)
+        super(TimeBasedCSVDataObject, self).__init__(csv_data)
+        self.time_column = time_column
+        self._time_series = TimeSeries.TimeSeries(time_column, self.getColumnData, schema)
 
+    def addColumn(self, column, values):
 
-        return [time_array, value_array]
+        super(TimeBasedCSVDataObject, self).addColumn(column, values)
+        self._time_series.invalidate()
 
+    def extendColumn(self, column, values):
 
+        super(TimeBasedCSVDataObject, self).extendColumn(column, values)
+        self._time_series.invalidate()
 
-    def interpolatedData(self, time_array, keys = None):
+    def interpolatedArray(self, time_array, keys = None):
 
-        if keys == None:
+        """
+        :rtype: numpy.ndarray
+        :return: ( time x column ) values in the order of keys, see TimeSeries.interpolatedArray
+        """
+
+        if keys is None:
 
             keys = self.keys
 
-        values = {}
+        return self._time_series.interpolatedArray(time_array, keys)
 
+    def getInterpolatedDataTimeSeries(self, time_array, column):
 
+        return self.interpolatedArray(time_array, [column])[:, 0]
 
-        for column in keys:
+    def getRawDataTimeSeries(self, column):
 
-            trimmed_whitespace_column = column.strip()
-            values[trimmed_whitespace_column] = self.getInterpolatedDataTimeSeries(time_array,column)
+        return self._time_series.getRawDataTimeSeries(column)
 
 
 
-        return values
+    def interpolatedData(self, time_array, keys = None):
+
+        if keys == None:
+
+            keys = self.keys
+
+        return self._time_series.interpolatedData(time_array, keys)
 
     def getEndingTime(self):
 
-        time_array = self.getColumnData(self.time_column)
-        return float(time_array[-1])
+        return self._time_series.getEndingTime()
 
-    def getFixedTimeData(self,time_array):
+    def getFixedTimeData(self,time_array, keys = None):
 
-        return self.interpolatedData(time_array)
+        return self.interpolatedData(time_array, keys)
 
 class SimulationResults(TimeBasedCSVDataObject):
 
-    def __init__(self, csv_data, time):
+    # Columns computed from the datafile columns, in dependency order: [ derived column, columns it needs, method ]
+    derived_columns = [
+        [ 'Integrated Power [J/m^3]', [ "Time [s]", "Power [W/m^3]" ], "getIntegratedPower" ],
+        [ 'Reactivity [pcm]', [ "k_eff" ], "getReactivityPCM" ],
+        [ 'Reactivity [$]', [ "k_eff", "Beta_eff" ], "getReactivityDollars" ],
+        [ 'Current Power Out [W/m^3]', [ "Time [s]", "Power [W/m^3]", "Integrated Outward Power [W*s/m^3]" ], "getOutwardPower" ],
+        [ "Power Difference [W/m^3]", [ "Power [W/m^3]", 'Current Power Out [W/m^3]' ], "getPowerDifference" ]
+    ]
 
-        super(SimulationResults,self).__init__(csv_data,time)
+    def __init__(self, csv_data, time, schema=None):
+
+        super(SimulationResults,self).__init__(csv_data,time,schema)
         self.populateExtraFields()
 
-    def populateExtraFields(self):
+    @classmethod
+    def getSourceColumns(cls, columns, time_column="Time [s]"):
 
-        integrated_power = 0
-        power_column = "Power [W/m^3]"
-        beta_column = "Beta_eff"
-        beta_uncertainty_column = "Beta_eff sigma"
-        k_eff_column = "k_eff"
-        k_eff_sigma_column = "k_eff sigma"
+        """
+        The datafile columns that have to be loaded to provide columns, i.e. including the inputs of derived columns
 
-        integrated_outward_power_key = "Integrated Outward Power [W*s/m^3]"
-        instantaneous_power_key = 'Current Power Out [W/m^3]'
+        :type columns: list[str]
+        :rtype: list[str]
+        """
 
-        last_time = 0
-        row_index = 0
-        row_length = len(self.csv_data)
-        outward_power = 0
+        source_columns = set(columns)
+        source_columns.add(time_column)
 
-        last_power = float(self.csv_data[0][power_column])
+        # walk backwards so derived columns built on other derived columns pull in all their inputs
+        for column, required_columns, method in reversed(cls.derived_columns):
 
-        for row in self.csv_data:
+            if column in source_columns:
 
+                source_columns.update(required_columns)
 
-            power = float(row[ power_column ])
+        return sorted(source_columns)
 
-            try:
+    def populateExtraFields(self, start=0):
+
+        """
+        Compute the derived columns for the rows from start on, start > 0 extends the columns derived earlier after
+        rows were appended
+        """
+
+        if start == 0:
+
+            self._derived_column_names = []
+
+        for column, required_columns, method in self.derived_columns:
+
+            if start > 0:
+
+                if column in self._derived_column_names:
+
+                    self.extendColumn(column, getattr(self, method)(start))
 
-                time = float(row[self.time_column])
+                continue
+
+            # columns written by the simulation itself take precedence
+            if column in self.csv_data:
+
+                continue
 
-            except:
+            if all([ required_column in self.csv_data for required_column in required_columns ]):
 
-                self.time_column = " " + self.time_column
-                time = float(row[self.time_column])
+                self._derived_column_names.append(column)
+                self.addColumn(column, getattr(self, method)())
 
-            k_eff = float(row[k_eff_column])
+    def appendRows(self, new_columns):
 
-            integrated_power = integrated_power + (time - last_time ) * (power + last_power) / 2
-            row['Integrated Power [J/m^3]'] = integrated_power
+        start = len(self.getColumnData(self.time_column))
 
-            reactivity = ( k_eff - 1.0 ) / k_eff
-            row['Reactivity [pcm]'] = reactivity * 10000
+        raw_columns = dict( (column, new_columns[column]) for column in new_columns if not column in self._derived_column_names )
+        super(SimulationResults, self).appendRows(raw_columns)
 
-            k_eff_sigma = float(row[ k_eff_sigma_column ])
+        self.populateExtraFields(start)
 
+    def getIntegratedPower(self, start=0):
 
+        times = self.getColumnData(self.time_column)
+        powers = self.getColumnData("Power [W/m^3]")
 
+        # trapezoidal rule starting from time 0 at the initial power, or continuing from the row before start
+        if start == 0:
 
-            if integrated_outward_power_key in row and not instantaneous_power_key in row:
+            [last_time, last_power, integrated_power] = [0, powers[0], 0]
 
-                if row_index >= 1:
+        else:
 
-                    current_outward_integrated_power = float(row[integrated_outward_power_key])
-                    last_outward_integrated_power = float(self.csv_data[row_index - 1][integrated_outward_power_key])
+            [last_time, last_power] = [times[start - 1], powers[start - 1]]
+            integrated_power = self.getColumnData('Integrated Power [J/m^3]')[start - 1]
 
+        times = times[start:]
+        powers = powers[start:]
 
-                    outward_power = (current_outward_integrated_power - last_outward_integrated_power)/(time - last_time)
+        time_steps = numpy.diff(times, prepend=last_time)
+        last_powers = numpy.concatenate(([last_power], powers[:-1]))
 
-                else:
+        return integrated_power + numpy.cumsum(time_steps * (powers + last_powers) / 2)
 
-                    outward_power =power
+    def getReactivity(self, start=0):
 
-                row[instantaneous_power_key] = outward_power
+        k_effs = self.getColumnData("k_eff")[start:]
+        return (k_effs - 1.0) / k_effs
 
+    def getReactivityPCM(self, start=0):
 
+        return self.getReactivity(start) * 10000
 
+    def getReactivityDollars(self, start=0):
 
+        return self.getReactivity(start) / self.getColumnData("Beta_eff")[start:]
 
+    def getOutwardPower(self, start=0):
 
-            #reactivity_sigma = abs(reactivity) * ( abs(k_eff_sigma/(k_eff-1))  + abs(k_eff_sigma / k_eff))
-            #row["Reactiviy Sigma [pcm]"] = reactivity_sigma * 10000
+        times = self.getColumnData(self.time_column)
+        outward_integrated_powers = self.getColumnData("Integrated Outward Power [W*s/m^3]")
 
-            beta = float(row[beta_column])
-            reactivity_dollars = reactivity / beta
-            row['Reactivity [$]'] = reactivity_dollars
+        if start == 0:
 
-            beta_sigma = float(row[beta_uncertainty_column])
-            #reactivity_dollars_sigma = abs( reactivity_dollars ) * (abs( beta_sigma / beta) + abs( reactivity_sigma / reactivity ))
-            #row['Reactivity Sigma [$]'] = reactivity_dollars_sigma
-            last_power = power
-            last_time = time
+            outward_powers = numpy.empty(len(times))
+            outward_powers[:1] = self.getColumnData("Power [W/m^3]")[:1]
+            outward_powers[1:] = numpy.diff(outward_integrated_powers) / numpy.diff(times)
 
-            row_index += 1
+            return outward_powers
 
-        for row in self.csv_data:
+        return numpy.diff(outward_integrated_powers[start - 1:]) / numpy.diff(times[start - 1:])
 
-            if  instantaneous_power_key in row:
-                row["Power Difference [W/m^3]"] = float(row[power_column]) - float(row[instantaneous_power_key])
+    def getPowerDifference(self, start=0):
+
+        return self.getColumnData("Power [W/m^3]")[start:] - self.getColumnData('Current Power Out [W/m^3]')[start:]
 
 class TemperatureData(TimeBasedCSVDataObject):
 
-    def getFixedTimeData(self,time_array):
+    """
+    :type positions: numpy.ndarray
+    """
 
-        data = super(TemperatureData,self).getFixedTimeData(time_array)
+    def __init__(self, csv_data, time_column, schema=None):
 
-        ordered_keys_dict = {}
-        ordered_keys_list = []
+        super(TemperatureData, self).__init__(csv_data, time_column, schema)
+        self.parsePositions()
 
+    def parsePositions(self):
 
-        for key in data:
+        """
+        Every column besides the time is named after its radial position, sort them along the radius once so synced
+        temperatures come out in position order
+        """
 
-            if key == self.time_column or key == '':
+        position_columns = []
+
+        for key in self.keys:
+
+            if key == self.time_column:
 
                 continue
 
             try:
 
-                float_key = float(key)
-                ordered_keys_dict[float_key] = key
-                ordered_keys_list.append(float_key)
+                position_columns.append([float(key), key])
 
-            except:
+            except ValueError:
 
-                pass
+                print("Temperature column " + key + " isn't a position, skipping it")
 
-            finally:
+        position_columns.sort()
 
-                positions = sort(ordered_keys_list)
+        self.positions = numpy.array([ position for position, column in position_columns ])
+        self._position_columns = [ column for position, column in position_columns ]
 
-        all_temperatures = []
+    def addColumn(self, column, values):
 
-        for index in range(0, len(time_array) ):
+        super(TemperatureData, self).addColumn(column, values)
+        self.parsePositions()
 
-            spatial_temperature_values_at_time = []
+    def getPositionColumns(self):
 
-            for position in positions:
+        return self._position_columns
 
-                spatial_temperature_values_at_time.append(data[ordered_keys_dict[position]][index])
-                #print str(time_array[index]) + " time " + ordered_keys_dict[key] + " location " + str(data[ordered_keys_dict[key]][index])
+    def getFixedTimeData(self,time_array):
 
-            all_temperatures.append(spatial_temperature_values_at_time)
+        """
+        :return: the sorted positions and the ( time x position ) temperatures at the times
+        :rtype: list[numpy.ndarray]
+        """
 
-        return [ positions, all_temperatures ]
+        return [ self.positions, self.interpolatedArray(time_array, self._position_columns) ]
 
     def getTemperatureExtremes(self):
 
+        return self.combineExtremes(dict( (column, self.getColumnExtremes(column)) for column in self._position_columns ))
+
+    @staticmethod
+    def combineExtremes(extremes, time_column="Time [s]"):
+
+        """
+        Lowest and highest temperature over the position columns of a temperature file given the extremes of its columns
+
+        :type extremes: dict[str, list[float]]
+        :rtype: list[float]
+        """
+
         max_temperature = -1
         min_temperature = 1e100
 
-        for time_data in self.csv_data:
+        for column in extremes:
+
+            if column == time_column:
+
+                continue
+
+            [column_min, column_max] = extremes[column]
+
+            max_temperature = max(max_temperature, column_max)
+            min_temperature = min(min_temperature, column_min)
+
+        return [ min_temperature, max_temperature ]
+
+
+class MicrocellData(TimeBasedCSVDataObject):
+
+    """
+    The aggregate microscale data, one set of Position-N, Temperature-N, Current-Power-N and Integrated-Power-N columns
+    per microcell node, indexed once into a ( field x time x node ) array
+    """
+
+    # field name and column name pattern of each slice of the field array
+    fields = [ ["position", "Position-%d [m]"], ["temperature", "Temperature-%d [K]"],
+               ["current-power", "Current-Power-%d [W]"], ["integrated-power", "Integrated-Power-%d [W-s]"] ]
+
+    def __init__(self, csv_data, time_column, schema=None):
+
+        super(MicrocellData, self).__init__(csv_data, time_column, schema)
+
+        self.number_nodes = 0
+
+        while "Position-%d [m]" % self.number_nodes in self.csv_data:
+
+            self.number_nodes += 1
+
+        self._field_table = None
+
+    @classmethod
+    def getFieldIndex(cls, field):
+
+        return [ field_name for field_name, column_pattern in cls.fields ].index(field)
+
+    def addColumn(self, column, values):
+
+        super(MicrocellData, self).addColumn(column, values)
+        self._field_table = None
+
+    def extendColumn(self, column, values):
+
+        super(MicrocellData, self).extendColumn(column, values)
+        self._field_table = None
+
+    def getFieldArray(self):
+
+        """
+        :rtype: numpy.ndarray
+        :return: the recorded ( field x time x node ) values, nan for the fields a node doesn't have
+        """
+
+        times = self.getColumnData(self.time_column)
+        field_array = numpy.full((len(self.fields), len(times), self.number_nodes), numpy.nan)
+
+        for field_index in range(len(self.fields)):
+
+            column_pattern = self.fields[field_index][1]
 
-            for key in time_data:
+            for node in range(self.number_nodes):
 
-                if key != 'Time [s]' and key != "" and key != " ":
+                if self.hasColumn(column_pattern % node):
 
-                    try:
+                    field_array[field_index, :, node] = self.getColumnData(column_pattern % node)
 
-                        temperature = float(time_data[key])
+        return field_array
 
-                    except:
+    def getFixedTimeData(self, time_array):
 
-                        temperature  = 800
+        """
+        :return: the ( field x time x node ) values at the times, index the fields with getFieldIndex
+        :rtype: numpy.ndarray
+        """
 
-                        print(key, time_data[key])
+        if self._field_table is None:
 
-                    if  temperature > max_temperature:
+            field_array = self.getFieldArray()
+            number_times = field_array.shape[1]
 
-                        max_temperature = temperature
+            # the interpolation works on ( time x column ), every field and node being a column
+            raw_values = field_array.transpose(1, 0, 2).reshape(number_times, -1)
+            self._field_table = TimeSeries.padTable(self.getColumnData(self.time_column), raw_values)
 
-                    if temperature < min_temperature:
+        time_array = numpy.asarray(time_array, dtype=numpy.float64)
+        synced_values = TimeSeries.resampleTable(self._field_table, time_array)
 
-                        min_temperature = temperature
+        return numpy.ascontiguousarray(synced_values.reshape(len(time_array), len(self.fields), self.number_nodes).transpose(1, 0, 2))
 
-        return [ min_temperature, max_temperature ]
\ No newline at end of file
@@ -3,6 +3,7 @@ import Result
 import os
 import re
 import math
+import concurrent.futures
 
 
 
@@ -178,10 +179,27 @@ def SiC_Comparison(run_name):
                         ending_time=10.0, multiscale=True)
 
 
+def loadResults(base_dir, folders, jobs=1, columns=None):
+
+    # Serially the files are parsed lazily as the views ask for them
+    if jobs <= 1:
+
+        return [ Result.Result(base_dir, folder, columns=columns) for folder in folders ]
+
+    # Otherwise parse the csv files of every run up front in a process pool, map keeps the folder order
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+
+        all_file_data = list(executor.map(Result.loadResultFiles, [base_dir] * len(folders), folders,
+                                          [Result.CSV_DATA_FILES] * len(folders), [True] * len(folders), [columns] * len(folders)))
+
+    return [ Result.Result(base_dir, folder, file_data=file_data, columns=columns) for folder, file_data in zip(folders, all_file_data) ]
+
+
 def postProcessMultiple(run_name,base_dir,folder_format,label_format, output_directory="Working-Dir/", heat_flux=False,
                         energy_view = True, video_view = True, still_view=True, still_view_spectrum = True, worth_view = True,
                         log_start_time=0.004, reposition=False,line_worth=False, power_scale="log",
-                        prompt_neutron_lifetime_axis="linear", time_comparison=1.9, ending_time = -1,plot_initial=True, multiscale=False):
+                        prompt_neutron_lifetime_axis="linear", time_comparison=1.9, ending_time = -1,plot_initial=True, multiscale=False,
+                        jobs=1):
 
     output_directory_path = base_dir + output_directory
 
@@ -218,9 +236,19 @@ def postProcessMultiple(run_name,base_dir,folder_format,label_format, output_dir
 
     OrderedKeys.sort()
 
-    for key in OrderedKeys:
-        folder = OrderedFolders[key]
-        result = Result.Result(base_dir, folder)
+    ordered_folders = [ OrderedFolders[key] for key in OrderedKeys ]
+
+    # The views to draw as [ ResultsList method, arguments ], only the columns they declare are parsed
+    views = []
+
+    if worth_view :
+        views.append([ "worthGraphs", { "line_worth" : line_worth } ])
+
+    views.append([ "plotBasicTemperatureAverages", { "time_axis" : "linear", "log_start_time" : log_start_time, "ending_time" : ending_time } ])
+
+    columns = ResultsList.ResultsList.getRequiredColumns([ view for view, arguments in views ])
+
+    for result in loadResults(base_dir, ordered_folders, jobs, columns):
         Results.addResult(result)
 
     '''
@@ -267,13 +295,11 @@ def postProcessMultiple(run_name,base_dir,folder_format,label_format, output_dir
 
 
     '''
-    if worth_view :
-        Results.worthGraphs(line_worth)
-        #Results.multiWorthGraphs(line_worth)
-
+    #Results.multiWorthGraphs(line_worth)
 
+    for view, arguments in views:
 
-    Results.plotBasicTemperatureAverages(time_axis="linear", log_start_time=log_start_time, ending_time=ending_time )
+        getattr(Results, view)(**arguments)
 
     '''if multiscale:
 
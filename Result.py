@@ -1,8 +1,99 @@
 import CSVClasses
 import SQLiteClasses
+import Schemas
+import SyncedData
+import TimeSeries
 import Worth
-import csv
 import os
+import numpy
+
+# The csv files of a run that are parsed into columns, tallydata.csv is ingested into SQLite instead
+CSV_DATA_FILES = [ "datafile.csv", "temperature-data.csv", "microscale-aggregate-data.csv", "worth.csv",
+                   "moderator-worth.csv", "fuel-worth.csv" ]
+
+# Files that are streamed into downsampled columns once they're larger than STREAMING_THRESHOLD bytes. The datafile is
+# never downsampled since its derived columns integrate over every row.
+STREAMED_DATA_FILES = [ "temperature-data.csv", "microscale-aggregate-data.csv" ]
+STREAMING_THRESHOLD = 1024 ** 3
+
+# Files a run keeps appending rows to while it's going, followed from the last consumed byte by Result.refresh
+FOLLOWED_DATA_FILES = [ "datafile.csv", "temperature-data.csv", "microscale-aggregate-data.csv" ]
+
+
+def loadDataFile(basedir, folder, datafile, use_cache=True, columns=None, streaming_threshold=STREAMING_THRESHOLD):
+
+    """
+    :rtype: dict[str, numpy.ndarray]
+    """
+
+    datafile_path = basedir + folder + "/" + datafile
+    columns = getFileColumns(columns, datafile)
+
+    if datafile in STREAMED_DATA_FILES and os.path.getsize(datafile_path) > streaming_threshold:
+
+        print("Streaming " + datafile_path)
+        streamed_columns = CSVClasses.streamCSVColumns(datafile_path, columns, schema=Schemas.getFileSchema(datafile))
+
+        # the streamed files are the ones worth not reading again just for their extremes
+        if use_cache:
+
+            CSVClasses.writeStreamedExtremes(datafile_path, streamed_columns)
+
+        return streamed_columns
+
+    return CSVClasses.loadCSVColumns(datafile_path, use_cache, columns, Schemas.getFileSchema(datafile))
+
+
+def getFileColumns(columns, datafile):
+
+    """
+    The columns to load from datafile given the per file column declaration of a Result, None meaning all of them
+
+    :type columns: dict[str, list[str] | None] | None
+    :type datafile: str
+    :rtype: list[str] | None
+    """
+
+    if columns is None or columns.get(datafile) is None:
+
+        return None
+
+    if datafile == "datafile.csv":
+
+        return CSVClasses.SimulationResults.getSourceColumns(columns[datafile])
+
+    return columns[datafile]
+
+
+def loadResultFiles(basedir, folder, data_files=CSV_DATA_FILES, use_cache=True, columns=None, streaming_threshold=STREAMING_THRESHOLD):
+
+    """
+    Parse the csv files of a run folder into picklable columns so a Result can be built from them in another process.
+    Missing files map to False. Given columns, the files it leaves out are skipped and the Result loads them on demand.
+
+    :rtype: dict[str, dict[str, numpy.ndarray] | bool]
+    """
+
+    file_data = {}
+
+    for datafile in data_files:
+
+        if columns is not None and not datafile in columns:
+
+            continue
+
+        datafile_path = basedir + folder + "/" + datafile
+
+        if os.path.isfile(datafile_path):
+
+            file_data[datafile] = loadDataFile(basedir, folder, datafile, use_cache, columns, streaming_threshold)
+
+        else:
+
+            file_data[datafile] = False
+
+    return file_data
+
 
 class Result:
 
@@ -11,86 +102,193 @@ class Result:
     """
 
 
-    def __init__(self, basedir, folder):
+    def __init__(self, basedir, folder, use_cache=True, file_data=None, columns=None, streaming_threshold=STREAMING_THRESHOLD, follow=False):
 
         self._basedir = basedir
         self._folder = folder
+        self._use_cache = use_cache
+        self._streaming_threshold = streaming_threshold
+
+        # In follow mode the files of a run that's still going are read up to their last complete row and refresh()
+        # appends whatever was written since, the byte offset to continue from is kept per file
+        self._follow = follow
+        self._file_offsets = {}
+
+        # CSVClasses.getCSVSignature of each followed file at its offset, a run restarted in place rewrites its files
+        self._file_signatures = {}
+
+        # the malformed cells of each followed file across its refreshes, so every column is reported once
+        self._malformed_reports = {}
+
+        # bumped by every refresh so anything derived from the data can tell it's out of date
+        self._revision = 0
+
+        # The columns to load per csv file (see ResultsList.getRequiredColumns), files left out are loaded in full when
+        # they're first accessed
+        self._columns = columns
+
+        # Columns that were already parsed elsewhere (see loadResultFiles) keyed by file name
+        if file_data is None:
+
+            file_data = {}
+
+        self._file_data = file_data
 
         if (not os.path.isdir(self.getPath() ) ):
 
             raise Exception("Folder " + self.getPath() + " doesn't exist")
 
-        datafile = self.getCSVDataFile("datafile.csv")
-        temperature = self.getCSVDataFile("temperature-data.csv")
-        tally = self.getCSVDataFile("tallydata.csv")
-        worth = self.getCSVDataFile("worth.csv")
-        moderator_worth  = self.getCSVDataFile("moderator-worth.csv")
-        fuel_worth = self.getCSVDataFile("fuel-worth.csv")
+        # Each data source is loaded the first time it's accessed, None means it hasn't been looked at yet and False
+        # means the run doesn't have it
+        self._simulation_data = None
+        self._temperature_data = None
+        self._tally_data = None
+        self._worth_data = None
+        self._moderator_worth_data = None
+        self._fuel_worth_data = None
+        self._microcell_temperature = None
 
+        # [ normalized positions, times, ( position x time ) temperatures ] built on first use by getTemperatureMatrix and
+        # the temperature histories getTemperatureVsTime sampled so far keyed by radial percentage
+        self._temperature_matrix = None
+        self._temperature_histories = {}
 
+    @property
+    def simulation_data(self):
 
-        # 'Neutron Lifetime sigma [s]','Power [W/m^3]','k_eff','Beta_eff sigma','Iteration', 'neutron lifetime [s]',
-        # 'Edge Temp [K]','Run Time [s]','Group 1','Group 2','Group 3','Group 5','Group 4','Group 6'
+        """
+        :rtype: CSVClasses.SimulationResults
+        """
 
-        microcell_temperature = self.getCSVDataFile("microscale-aggregate-data.csv")
+        if self._simulation_data is None:
 
-        if microcell_temperature:
+            # 'Neutron Lifetime sigma [s]','Power [W/m^3]','k_eff','Beta_eff sigma','Iteration', 'neutron lifetime [s]',
+            # 'Edge Temp [K]','Run Time [s]','Group 1','Group 2','Group 3','Group 5','Group 4','Group 6'
+            datafile = self.getCSVDataFile("datafile.csv")
 
-            self._microcell_temperature = CSVClasses.TimeBasedCSVDataObject(microcell_temperature, 'Time [s]')
+            if datafile:
 
-        else:
+                self._simulation_data = CSVClasses.SimulationResults(datafile, 'Time [s]', Schemas.getFileSchema("datafile.csv"))
 
-            self._microcell_temperature = False
+            else:
 
-        if datafile:
+                self._simulation_data = False
 
-            self._simulation_data = CSVClasses.SimulationResults(datafile, 'Time [s]')
+        return self._simulation_data
 
-        if temperature:
+    @property
+    def temperature_data(self):
 
-            self._temperature_data = CSVClasses.TemperatureData(temperature, 'Time [s]')
-        else:
-            self._temperature_data = False
+        """
+        :rtype: CSVClasses.TemperatureData
+        """
 
-        if tally:
+        if self._temperature_data is None:
 
-            self._tally_data =  SQLiteClasses.TallyData(u"Tallies", self.getPath() )
+            temperature = self.getCSVDataFile("temperature-data.csv")
 
-        else:
+            if temperature:
 
-            self._tally_data = False
+                self._temperature_data = CSVClasses.TemperatureData(temperature, 'Time [s]', Schemas.getFileSchema("temperature-data.csv"))
 
-        if worth:
+            else:
 
-            self._worth_data = Worth.WorthResults(worth)
+                self._temperature_data = False
 
-        else:
+        return self._temperature_data
 
-            self._worth_data = False
+    @property
+    def tally_data(self):
 
+        """
+        :rtype: SQLiteClasses.TallyData
+        """
 
-        if moderator_worth:
+        if self._tally_data is None:
 
-            self._moderator_worth_data = Worth.WorthResults(moderator_worth, type="Moderator")
+            if self.hasDataFile("tallydata.csv"):
 
-        else:
+                self._tally_data = SQLiteClasses.TallyData(u"Tallies", self.getPath() )
 
-            self._moderator_worth_data = False
+            else:
 
-        if fuel_worth:
+                self._tally_data = False
 
-            self._fuel_worth_data = Worth.WorthResults(fuel_worth)
+        return self._tally_data
 
-        else:
+    @property
+    def worth_data(self):
+
+        """
+        :rtype: Worth.WorthResults
+        """
+
+        if self._worth_data is None:
+
+            self._worth_data = self.getWorthData("worth.csv")
+
+        return self._worth_data
+
+    @property
+    def moderator_worth_data(self):
+
+        """
+        :rtype: Worth.WorthResults
+        """
 
-            self._fuel_worth_data = False
+        if self._moderator_worth_data is None:
 
-        self._ordered_temperature = False
-        self._ordered_time = False
+            self._moderator_worth_data = self.getWorthData("moderator-worth.csv", type="Moderator")
+
+        return self._moderator_worth_data
+
+    @property
+    def fuel_worth_data(self):
+
+        """
+        :rtype: Worth.WorthResults
+        """
+
+        if self._fuel_worth_data is None:
+
+            self._fuel_worth_data = self.getWorthData("fuel-worth.csv")
+
+        return self._fuel_worth_data
+
+    @property
+    def microcell_temperature(self):
+
+        """
+        :rtype: CSVClasses.MicrocellData
+        """
+
+        if self._microcell_temperature is None:
+
+            microcell_temperature = self.getCSVDataFile("microscale-aggregate-data.csv")
+
+            if microcell_temperature:
+
+                self._microcell_temperature = CSVClasses.MicrocellData(microcell_temperature, 'Time [s]', Schemas.getFileSchema("microscale-aggregate-data.csv"))
+
+            else:
+
+                self._microcell_temperature = False
+
+        return self._microcell_temperature
+
+    def getWorthData(self, worth_file, type="fuel"):
+
+        worth = self.getCSVDataFile(worth_file)
+
+        if worth:
+
+            return Worth.WorthResults(worth, type=type)
+
+        return False
 
     def getSimulationData(self,microcell=False):
 
-        return self._simulation_data
+        return self.simulation_data
 
     def getPath(self):
 
@@ -102,15 +300,28 @@ class Result:
 
     def getTemperatureExtremes(self):
 
-        if self._temperature_data:
+        # before the temperatures are needed the extremes recorded in the column cache are enough
+        if self._temperature_data is None and self._use_cache and not self._follow and not "temperature-data.csv" in self._file_data:
+
+            temperature_path = self.getPath() + "/temperature-data.csv"
+
+            if os.path.isfile(temperature_path):
+
+                extremes = CSVClasses.readCachedExtremes(temperature_path)
 
-            return self._temperature_data.getTemperatureExtremes()
+                if extremes is not None:
+
+                    return CSVClasses.TemperatureData.combineExtremes(extremes)
+
+        if self.temperature_data:
+
+            return self.temperature_data.getTemperatureExtremes()
 
         else:
 
             return [300, 3000]
 
-    def getCSVDataFile(self, datafile):
+    def hasDataFile(self, datafile):
 
         datafile_path = self.getPath() + "/" + datafile
 
@@ -119,104 +330,182 @@ class Result:
             print("Datafile " + datafile_path + " doesn't exist")
             return False
 
-        csv_data = self.getFileData(datafile_path)
+        return True
 
-        return csv_data
+    def getCSVDataFile(self, datafile):
 
-        # def processTallyData(self):
-    def getTemperatureVsTime(self, positions):
+        if datafile in self._file_data:
+
+            # hand the columns over, the data object built from them keeps its own reference
+            return self._file_data.pop(datafile)
 
-        #if self._ordered_time == False or self._ordered_temperature == False:
+        if not self.hasDataFile(datafile):
 
-        ordered_data = []
-        times = []
+            return False
+
+        if self._follow and datafile in FOLLOWED_DATA_FILES:
+
+            # the cache is skipped since the file is still growing
+            datafile_path = self.getPath() + "/" + datafile
+            self._malformed_reports[datafile] = CSVClasses.MalformedValueReport()
+
+            [columns, self._file_offsets[datafile]] = CSVClasses.readCSVTail(datafile_path, 0, getFileColumns(self._columns, datafile), Schemas.getFileSchema(datafile), self._malformed_reports[datafile])
+            self._file_signatures[datafile] = CSVClasses.getCSVSignature(datafile_path, self._file_offsets[datafile])
+            self._malformed_reports[datafile].printReport()
+
+            return columns
 
-        for row in self._temperature_data.csv_data:
+        return loadDataFile(self._basedir, self._folder, datafile, self._use_cache, self._columns, self._streaming_threshold)
 
-            times.append(row["Time [s]"])
+    def refresh(self):
 
+        """
+        Append the rows written since the last load or refresh to the followed data sources, sources that haven't been
+        loaded yet will read the whole file when they're first accessed and so will sources whose file was rewritten
+        """
 
-        for key in self._temperature_data.keys:
+        if not self._follow:
 
-            if key != "Time [s]" and key != "Time [s] " and key != " " and key != "":
+            raise Exception("Result " + self.getPath() + " isn't following its files")
 
-                key_data = { "temperature" : [], "position" : float(key) }
+        followed_sources = [ ["datafile.csv", "_simulation_data"], ["temperature-data.csv", "_temperature_data"],
+                             ["microscale-aggregate-data.csv", "_microcell_temperature"] ]
 
-                for row in self._temperature_data.csv_data:
+        for datafile, attribute in followed_sources:
 
-                    key_data["temperature"].append(float(row[key]))
+            data_object = getattr(self, attribute)
 
-                ordered_data.append(key_data)
+            if data_object is False:
 
-        ordered_data.sort(key=lambda position: position['position'])
+                # the run may have started writing the file since we last looked
+                setattr(self, attribute, None)
 
-        max_position = ordered_data[-1]["position"]
+            elif data_object is not None:
 
-        if max_position <= 0:
-            max_position = 1
+                datafile_path = self.getPath() + "/" + datafile
 
-        for data in ordered_data:
+                if not os.path.isfile(datafile_path) or CSVClasses.getCSVSignature(datafile_path, self._file_offsets[datafile]) != self._file_signatures[datafile]:
 
-            data["position"] *= 100.0/ max_position
+                    print(datafile_path + " was rewritten, reading it again")
+                    setattr(self, attribute, None)
+                    continue
 
-        times = [ float(time) for time in times]
+                [columns, self._file_offsets[datafile]] = CSVClasses.readCSVTail(datafile_path, self._file_offsets[datafile], getFileColumns(self._columns, datafile), Schemas.getFileSchema(datafile), self._malformed_reports[datafile])
+                self._file_signatures[datafile] = CSVClasses.getCSVSignature(datafile_path, self._file_offsets[datafile])
+                self._malformed_reports[datafile].printReport()
+                data_object.appendRows(columns)
 
+        if self._tally_data is False:
 
-        return_ordered_data = []
+            self._tally_data = None
 
-        for position in positions:
+        elif self._tally_data is not None:
 
-            lower = -1
+            self._tally_data.refresh()
 
-            for index in range( len(ordered_data) ):
+        self._temperature_matrix = None
+        self._temperature_histories = {}
+        self._revision += 1
+
+    def getRevision(self):
+
+        return self._revision
+
+        # def processTallyData(self):
+    def getTemperatureMatrix(self):
 
+        """
+        The radial positions of the temperature columns as a percentage of the outermost one, the recorded times and the
+        temperatures stacked into a ( position x time ) matrix
 
-                higher = ordered_data[index]["position"]
+        :rtype: list[numpy.ndarray]
+        """
 
-                if (position >= lower and position <= higher) or index == len(ordered_data) - 1:
+        if self._temperature_matrix is None:
 
-                    return_ordered_data.append(ordered_data[index])
-                    break
+            temperature_data = self.temperature_data
+            positions = temperature_data.positions
 
-                lower = higher
+            max_position = positions[-1]
 
-        return_ordered_data.sort(key=lambda position: position['position'])
+            if max_position <= 0:
+                max_position = 1
 
-        #self._ordered_temperature = return_ordered_data
-        #self._ordered_time = times
+            temperatures = numpy.array([ temperature_data.getColumnData(column) for column in temperature_data.getPositionColumns() ])
 
-        return [times, return_ordered_data]
+            self._temperature_matrix = [ positions * (100.0 / max_position), temperature_data.getColumnData("Time [s]"), temperatures ]
 
+        return self._temperature_matrix
 
+    def getTemperatureAtRadius(self, positions, time_array=None):
 
+        """
+        Bilinear radius x time sampling of the temperature matrix. Positions are percentages of the outermost radius and
+        are interpolated between the neighbouring columns, both axes are held at their end values outside of the record.
 
-    def getFixedTimeData(self,desired_time_array, sync_tally = True):
+        :type positions: list[float]
+        :param time_array: times to sample at, the recorded times by default
+        :rtype: numpy.ndarray
+        :return: ( position x time ) temperatures
+        """
 
-        ending_time = self.getEndingTime()
+        [normalized_positions, times, temperatures] = self.getTemperatureMatrix()
+        positions = numpy.asarray(positions, dtype=numpy.float64)
 
-        time_array = [ time for time in desired_time_array ]
+        if len(normalized_positions) == 1:
 
-        data = self._simulation_data.getFixedTimeData(time_array)
-        [positions, all_temperatures] = self._temperature_data.getFixedTimeData(time_array)
+            radial_temperatures = numpy.repeat(temperatures, len(positions), axis=0)
+
+        else:
+
+            radial_temperatures = TimeSeries.resampleTable([normalized_positions, temperatures], positions)
+
+        if time_array is None:
+
+            return radial_temperatures
+
+        return TimeSeries.resampleTable([times, radial_temperatures.T], numpy.asarray(time_array, dtype=numpy.float64)).T
+
+    def getTemperatureVsTime(self, positions):
 
-        tally_data = []
-        if self._tally_data and sync_tally:
+        """
+        Temperature histories at the requested radial percentages over the recorded times. Histories are kept per position,
+        so asking for all the positions of a figure up front samples them in a single call.
 
-            tally_data = self._tally_data.getFixedTimeData(time_array)
+        :type positions: list[float]
+        :rtype: list
+        :return: [ times, [ { "temperature" : history, "position" : position } ] ] sorted by position
+        """
 
-        microcell_temp = []
-        if self._microcell_temperature:
+        missing_positions = sorted(set( float(position) for position in positions if not position in self._temperature_histories ))
 
-            microcell_temp = self._microcell_temperature.getFixedTimeData(time_array)
+        if missing_positions:
 
+            sampled_temperatures = self.getTemperatureAtRadius(missing_positions)
 
-        return { "time": time_array, "data" : data, "positions" : positions, "temperatures" : all_temperatures, "tallies" : tally_data, "microcell-temperature" : microcell_temp }
+            for index in range(len(missing_positions)):
+
+                self._temperature_histories[missing_positions[index]] = sampled_temperatures[index]
+
+        ordered_data = [ { "temperature" : self._temperature_histories[position], "position" : float(position) } for position in sorted(positions) ]
+
+        return [self.getTemperatureMatrix()[1], ordered_data]
+
+
+
+    def getFixedTimeData(self,desired_time_array, columns = None):
+
+        """
+        All the run data synced onto desired_time_array at once, see SyncedData.SyncedRunData for syncing it lazily
+        """
+
+        return dict(SyncedData.SyncedRunData(self, desired_time_array, columns))
 
 
 
     def getEndingTime(self):
 
-        return self._simulation_data.getEndingTime()
+        return self.simulation_data.getEndingTime()
 
 
     def getInputFileData(self,input_file="input_file.inp"):
@@ -235,18 +524,3 @@ class Result:
 
 
 
-
-    def getFileData(self, csv_file ):
-
-        output = []
-
-        with open( csv_file, 'r') as csv_file_object:
-
-            csv_data = csv.DictReader(csv_file_object, delimiter=',' )
-
-
-            for row in csv_data:
-
-                output.append(row)
-
-        return output
@@ -4,20 +4,77 @@ import numpy
 import matplotlib.pyplot as pyplot
 import math
 import Result
+import SyncedData
 import time
-import csv
 import CSVClasses
 import matplotlib.patches as patches
 import matplotlib as mpl
+import collections
 
 mpl.rcParams['xtick.labelsize'] = 16
 mpl.rcParams['ytick.labelsize'] = 16
 
+# How many synced time grids syncResultsTiming keeps around for the views drawn after it
+SYNC_CACHE_SIZE = 8
+
 class ResultsList(object):
     """
     :type _results: list[TransientResult.TransientResult]
     """
 
+    # The csv columns each view reads per run file, None meaning every column of the file. Files a view doesn't
+    # list aren't needed by it. Derived datafile columns resolve to their inputs in Result.getFileColumns. addResult
+    # reads the temperature extremes of every run.
+    _synced_power_columns = [ "Power [W/m^3]", "k_eff", "k_eff sigma", "Integrated Power [J/m^3]" ]
+
+    view_columns = {
+        "addResult" : { "temperature-data.csv" : None },
+        "plotInitialTemperatures" : { "temperature-data.csv" : None },
+        "plotBasicTemperatureAverages" : { "datafile.csv" : [ "Moderator Temp [K]", "Fuel Temp [K]", "Power [W/m^3]", "k-fixed" ] },
+        "standardVideoView" : { "datafile.csv" : _synced_power_columns, "temperature-data.csv" : None },
+        "multiscaleVideoView" : { "datafile.csv" : _synced_power_columns, "temperature-data.csv" : None,
+                                  "microscale-aggregate-data.csv" : None },
+        "standardEnergyView" : { "datafile.csv" : [ "k_eff" ], "temperature-data.csv" : None },
+        "plotDelayedPrecursors" : { "datafile.csv" : [ "Group " + str(group) for group in range(1, 7) ] },
+        "stillViewSingle" : { "datafile.csv" : _synced_power_columns + [ "neutron lifetime [s]" ], "temperature-data.csv" : None },
+        "stillViewMultipleGraphs" : { "datafile.csv" : _synced_power_columns + [ "neutron lifetime [s]" ], "temperature-data.csv" : None },
+        "boundaryHeatFluxPlot" : { "datafile.csv" : [ "Integrated Outward Power [W*s/m^3]", "Power [W/m^3]",
+                                                      "Current Power Out [W/m^3]", "Power Difference [W/m^3]" ] },
+        "stillViewSpectrumSingle" : { "datafile.csv" : [ "Beta_eff", "Beta_eff sigma", "neutron lifetime [s]", "Neutron Lifetime sigma [s]" ],
+                                      "temperature-data.csv" : None },
+        "stillViewAbsorption" : { "temperature-data.csv" : None },
+        "worthGraphs" : { "worth.csv" : None, "moderator-worth.csv" : None },
+        "multiWorthGraphs" : { "worth.csv" : None, "moderator-worth.csv" : None, "fuel-worth.csv" : None }
+    }
+
+    @classmethod
+    def getRequiredColumns(cls, views):
+
+        """
+        Merge the column declarations of the views that are going to be drawn into the columns argument of Result. Files
+        none of the views read are left out, a Result loads those in full if they're accessed after all.
+
+        :type views: list[str]
+        :rtype: dict[str, list[str] | None]
+        """
+
+        # every synced view needs the time axis and the ending time
+        required_columns = { "datafile.csv" : set([ "Time [s]" ]) }
+
+        for view in [ "addResult" ] + list(views):
+
+            for datafile, columns in cls.view_columns[view].items():
+
+                if columns is None or required_columns.get(datafile, set()) is None:
+
+                    required_columns[datafile] = None
+
+                else:
+
+                    required_columns.setdefault(datafile, set()).update(columns)
+
+        return dict( (datafile, None if columns is None else sorted(columns)) for datafile, columns in required_columns.items() )
+
     def __init__(self, output_directory, run_name, label_regex="", label_format=""):
 
         self._results = []
@@ -42,6 +99,9 @@ class ResultsList(object):
         self._resonance_data_object = False
         self._data = []
 
+        # synced data of the recent syncResultsTiming calls, least recently used first
+        self._synced_data_cache = collections.OrderedDict()
+
     def addResult(self, result):
 
         if not isinstance(result, Result.Result):
@@ -58,6 +118,7 @@ class ResultsList(object):
             self._min_temperature = min_result_temperature
 
         self._results.append(result)
+        self._synced_data_cache.clear()
 
 
 
@@ -90,7 +151,28 @@ class ResultsList(object):
 
         return latest_ending_time
 
-    def syncResultsTiming(self, divisions, time_axis, log_start_time=0.001, sync_tally=True):
+    def syncResultsTiming(self, divisions, time_axis, log_start_time=0.001, columns=None):
+
+        """
+        Interpolate every run onto a shared time grid, each family of run data being synced when it's first read. The
+        result is cached, so views asking for the same grid share it and must treat it as read only. A run refreshing
+        its data invalidates the entries it's part of.
+
+        :type columns: list[str] | None
+        :param columns: datafile columns to sync, all of them by default
+        """
+
+        if columns is not None:
+
+            columns = tuple(sorted(columns))
+
+        revisions = tuple( result.getRevision() for result in self._results )
+        cache_key = (divisions, time_axis, log_start_time, columns, revisions)
+
+        if cache_key in self._synced_data_cache:
+
+            self._synced_data_cache.move_to_end(cache_key)
+            return self._synced_data_cache[cache_key]
 
         ending_time = self.getLastEndingTime()
 
@@ -102,14 +184,13 @@ class ResultsList(object):
 
             time_array = numpy.linspace(0, ending_time, divisions)
 
-        synced_data = {}
+        synced_data = SyncedData.SyncedData(self._results, time_array, columns)
 
-        for result in self._results:
-            name = result.getFolderName()
-            data = result.getFixedTimeData(time_array, sync_tally=sync_tally)
-            synced_data[name] = data
+        self._synced_data_cache[cache_key] = synced_data
 
-        synced_data["time"] = time_array
+        while len(self._synced_data_cache) > SYNC_CACHE_SIZE:
+
+            self._synced_data_cache.popitem(last=False)
 
         return synced_data
 
@@ -117,16 +198,7 @@ class ResultsList(object):
 
         time_array = [start_time, time]
 
-        synced_data = {}
-
-        for result in self._results:
-            name = result.getFolderName()
-            data = result.getFixedTimeData(time_array)
-            synced_data[name] = data
-
-        synced_data["time"] = time_array
-
-        return synced_data
+        return SyncedData.SyncedData(self._results, time_array)
 
     def getTemperatureExtremes(self, synced_data):
 
@@ -141,40 +213,23 @@ class ResultsList(object):
 
         if self._resonance_data_object == False:
 
-            resonance_data = []
-
-            with open("resonance.csv", 'r') as csv_file_object:
-
-                csv_data = csv.DictReader(csv_file_object, delimiter=',')
-
-                for row in csv_data:
-                    resonance_data.append(row)
-
-
+            resonance_data = CSVClasses.readCSVColumns("resonance.csv")
             self._resonance_data_object = CSVClasses.CSVDataObject(resonance_data)
 
         energies_raw = self._resonance_data_object.getColumnData("Energy [eV]")
-        energies = [float(energy) / 1e6 for energy in energies_raw]
+        energies = energies_raw / 1e6
 
         ax2 = axis.twinx()
 
         if "W" in isotopes:
 
-            w_resonance_data = []
-
-            with open("tungsten-resonance.csv", 'r') as csv_file_object:
-
-                csv_data = csv.DictReader(csv_file_object, delimiter=',')
-
-                for row in csv_data:
-                    w_resonance_data.append(row)
-
+            w_resonance_data = CSVClasses.readCSVColumns("tungsten-resonance.csv")
             tugsten_resonance_data_object = CSVClasses.CSVDataObject(w_resonance_data)
             cs_raw = tugsten_resonance_data_object.getColumnData("W Capture [b]")
-            cross_sections = [float(cross_section) for cross_section in cs_raw]
+            cross_sections = cs_raw
 
             w_energies_raw = tugsten_resonance_data_object.getColumnData("Energy [eV]")
-            w_energies = [float(energy) / 1e6 for energy in w_energies_raw]
+            w_energies = w_energies_raw / 1e6
 
             ax2.plot(w_energies, cross_sections, label="W Capture", color='#990000')
 
@@ -183,14 +238,14 @@ class ResultsList(object):
             if 'capture' in resonance_types:
 
                 cs_raw = self._resonance_data_object.getColumnData("U-238 Capture [b]")
-                cross_sections = [ float(cross_section)  for cross_section in cs_raw]
+                cross_sections = cs_raw
 
                 ax2.plot(energies, cross_sections, label="U-238 Capture", color='orange')
 
             if 'absorption' in resonance_types:
 
                 cs_raw = self._resonance_data_object.getColumnData("U-238 Capture [b]")
-                cross_sections = [ float(cross_section)  for cross_section in cs_raw]
+                cross_sections = cs_raw
 
                 ax2.plot(energies, cross_sections, label="U-238 Absorption", color='orange')
 
@@ -199,14 +254,14 @@ class ResultsList(object):
             if 'capture' in resonance_types:
 
                 cs_raw = self._resonance_data_object.getColumnData("U-235 Capture [b]")
-                cross_sections = [float(cross_section) for cross_section in cs_raw]
+                cross_sections = cs_raw
 
                 ax2.plot(energies, cross_sections, label="U-235 Capture", color='orange')
 
             if 'fission' in resonance_types:
 
                 cs_raw = self._resonance_data_object.getColumnData("U-235 Fission [b]")
-                cross_sections = [float(cross_section) for cross_section in cs_raw]
+                cross_sections = cs_raw
 
                 ax2.plot(energies, cross_sections, label="U-235 Fission", color='#CC511E')
 
@@ -215,7 +270,7 @@ class ResultsList(object):
                 abs_cs_raw = self._resonance_data_object.getColumnData("U-235 Capture [b]")
                 fission_cs_raw = self._resonance_data_object.getColumnData("U-235 Fission [b]")
 
-                cross_sections = [float(absorption) + float(fission) for fission,absorption in zip(fission_cs_raw, abs_cs_raw) ]
+                cross_sections = abs_cs_raw + fission_cs_raw
 
                 ax2.plot(energies, cross_sections, label="U-235 Absorption", color='orange')
 
@@ -225,16 +280,14 @@ class ResultsList(object):
                 abs_cs_raw_235 = self._resonance_data_object.getColumnData("U-235 Capture [b]")
                 abs_cs_raw_238 = self._resonance_data_object.getColumnData("U-238 Capture [b]")
 
-                cross_sections = [
-                    enrichment * (float(capture_235) ) + (1 - enrichment) * float(capture_238) for
-                    capture_235, capture_238 in zip( abs_cs_raw_235, abs_cs_raw_238)]
+                cross_sections = enrichment * abs_cs_raw_235 + (1 - enrichment) * abs_cs_raw_238
 
                 ax2.plot(energies, cross_sections, label="U Capture " + str(enrichment_percent) + "% Enrich" , color='orange')
 
             if 'fission' in resonance_types:
 
                 cs_raw = self._resonance_data_object.getColumnData("U-235 Fission [b]")
-                cross_sections = [float(cross_section) for cross_section in cs_raw]
+                cross_sections = cs_raw
 
                 ax2.plot(energies, cross_sections, label="U Fission", color='#CC511E')
 
@@ -244,7 +297,7 @@ class ResultsList(object):
                 fission_cs_raw_235 = self._resonance_data_object.getColumnData("U-235 Fission [b]")
                 abs_cs_raw_238 = self._resonance_data_object.getColumnData("U-238 Capture [b]")
 
-                cross_sections = [ enrichment * (float(capture_235) + float(fission_235)) + (1 - enrichment) * float(capture_238) for fission_235,capture_235, capture_238 in zip(fission_cs_raw_235, abs_cs_raw_235, abs_cs_raw_238) ]
+                cross_sections = enrichment * (abs_cs_raw_235 + fission_cs_raw_235) + (1 - enrichment) * abs_cs_raw_238
 
 
                 ax2.plot(energies, cross_sections, label="U Absorption " + str(enrichment_percent) + "% Enrich", color='orange')
@@ -494,15 +547,11 @@ class ResultsList(object):
             result = self._results[result_index]
             label = self._labels[result.getFolderName()]
 
-            if result._tally_data:
+            if result.tally_data:
 
-                [ times, all_tally_values, all_tally_sigmas] = result._tally_data.getRelativeTallyTotals(type=tally_type)
+                [ times, all_tally_values, all_tally_sigmas] = result.tally_data.getRelativeTallyTotals(type=tally_type)
                 key = "%s-%g-%g" % (tally_type, zone, cell)
 
-                if not key in all_tally_values:
-
-                    key = " " + key
-
                 all_tally_values[key] = [ 100*value for value in all_tally_values[key]]
                 all_tally_sigmas[key] = [ 100*value for value in all_tally_sigmas[key]]
 
@@ -577,7 +626,7 @@ class ResultsList(object):
 
             geometry = result.getInputFileData()
 
-            if result._tally_data:
+            if result.tally_data:
 
                 #start_time = time.time()
 
@@ -589,13 +638,13 @@ class ResultsList(object):
 
                     #create the keys for the flux fields we want only
                     desired_keys = []
-                    for zone in range( 1, result._tally_data._number_zones + 1) :
-                        for cell in range(1, result._tally_data._number_cells + 1):
+                    for zone in range( 1, result.tally_data._number_zones + 1) :
+                        for cell in range(1, result.tally_data._number_cells + 1):
                             desired_keys.append("%s-%g-%g" % (tally_type, zone, cell))
 
 
                     #Now grab the data
-                    flux_data[result_index] = result._tally_data.getFixedTimeData(all_times,desired_keys)
+                    flux_data[result_index] = result.tally_data.getFixedTimeData(all_times,desired_keys)
 
                 label = self._labels[result.getFolderName()]
                 zone = 1
@@ -607,25 +656,20 @@ class ResultsList(object):
 
                 for radius in geometry["radaii"]:
 
-                    for cell in range(1,result._tally_data._number_cells + 1):
+                    for cell in range(1,result.tally_data._number_cells + 1):
 
                         key = "%s-%g-%g"%(tally_type,zone,cell)
 
-                        if not key in flux_data[result_index]:
-                            key = " " + key
-
                         if not key in flux_data[result_index]:
                             print("skipping " + key )
                             continue
 
                         tally_counts = flux_data[result_index][key ][1][current_time_index]
                         tally_uncertainties = flux_data[result_index][key][2][current_time_index]
-                        tally_counts = [ float(datum) for datum in tally_counts ]
-
-                        tally_sigma = sum([ (float(tally_uncertainty)*count)**2 for tally_uncertainty,count in zip(tally_uncertainties,tally_counts) ])**0.5
+                        tally_sigma = sum([ (tally_uncertainty*count)**2 for tally_uncertainty,count in zip(tally_uncertainties,tally_counts) ])**0.5
 
                         total_tally_counts = sum(tally_counts)
-                        tally_radius = last_radius + ( radius - last_radius ) * (cell - 1) / result._tally_data._number_cells
+                        tally_radius = last_radius + ( radius - last_radius ) * (cell - 1) / result.tally_data._number_cells
                         tally_plot_sum_list.append(total_tally_counts)
                         tally_radaii.append(tally_radius)
                         tally_sigmas.append(tally_sigma)
@@ -771,7 +815,7 @@ class ResultsList(object):
 
         temp_ax = pyplot.subplot2grid((figure_rows, 1), (3, 0), colspan=2, rowspan=4)
 
-        temperature_synced_data = self.syncResultsTiming(100, time_axis, log_start_time, sync_tally=False)
+        temperature_synced_data = self.syncResultsTiming(100, time_axis, log_start_time)
         self.graphTemperatureAtPoint(temp_ax, temperature_synced_data, temperature_graph_positions, time_axis,"linear", log_start_time=log_start_time,legend=True, ending_time=ending_time )
 
 
@@ -826,12 +870,17 @@ class ResultsList(object):
 
         index = 0
 
-        temperature_synced_data = self.syncResultsTiming(100, time_axis, log_start_time, sync_tally=False)
+        temperature_synced_data = self.syncResultsTiming(100, time_axis, log_start_time)
 
         keys = [float(key) for key in temperature_graph_positions.keys() ]
 
         keys = sorted(keys)
 
+        # sample every probe position of each run together, the graphs below reuse the histories
+        for run in self._results:
+
+            run.getTemperatureVsTime(keys)
+
         for key in keys:
 
             width_increment = int(math.floor(width_graphs/3))
@@ -949,9 +998,8 @@ class ResultsList(object):
 
             # Many points with temperatures
             else:
-                max_position = max(synced_data[run_name]['positions'])
-                relative_positions = [100.0 * position / max_position for position in
-                                      synced_data[run_name]['positions']]
+                run_positions = synced_data[run_name]['positions']
+                relative_positions = 100.0 * run_positions / run_positions.max()
 
                 positions[run_name] = relative_positions
 
@@ -1371,7 +1419,7 @@ class ResultsList(object):
 
     def standardVideoView(self, time_step_divisions, time_axis="log", log_start_time=0.001, ending_time=-1):
 
-        synced_data = self.syncResultsTiming(time_step_divisions,time_axis, log_start_time, sync_tally=False)
+        synced_data = self.syncResultsTiming(time_step_divisions,time_axis, log_start_time)
 
         time_list = synced_data["time"]
 
@@ -1429,7 +1477,7 @@ class ResultsList(object):
 
     def multiscaleVideoView(self, time_step_divisions, time_axis="log", log_start_time=0.001, ending_time=-1):
 
-        synced_data = self.syncResultsTiming(time_step_divisions,time_axis, log_start_time, sync_tally=False)
+        synced_data = self.syncResultsTiming(time_step_divisions,time_axis, log_start_time)
 
         time_list = synced_data["time"]
 
@@ -1506,7 +1554,7 @@ class ResultsList(object):
         '''
         for result in self._results:
 
-            worth_data = result._worth_data
+            worth_data = result.worth_data
 
             #sometime there isn't worth data
             if worth_data:
@@ -1540,7 +1588,7 @@ class ResultsList(object):
 
         for result in self._results:
 
-            worth_data = result._worth_data
+            worth_data = result.worth_data
 
             #sometime there isn't worth data
             if worth_data:
@@ -1587,12 +1635,12 @@ class ResultsList(object):
 
         for result in self._results:
 
-            worth_data = result._worth_data
+            worth_data = result.worth_data
 
             # sometime there isn't worth data
             if worth_data:
                 label = self._labels[result.getFolderName()]
-                k_inf = float(worth_data.csv_data[0]["K-eigenvalue"])
+                k_inf = worth_data.getColumnData("K-eigenvalue")[0]
                 k_inf_data.append(k_inf) #10**5*(k_inf - 1)/k_inf)
                 k_inf_labels.append(label)
                 indicies.append(index_counter)
@@ -1626,7 +1674,7 @@ class ResultsList(object):
         '''
         for result in self._results:
 
-            worth_data = result._moderator_worth_data
+            worth_data = result.moderator_worth_data
 
             # sometime there isn't worth data
             if worth_data:
@@ -1667,9 +1715,9 @@ class ResultsList(object):
 
         for result in self._results:
 
-            moderator_worth_data = result._moderator_worth_data
-            fuel_worth_data = result._fuel_worth_data
-            worth_data = result._worth_data
+            moderator_worth_data = result.moderator_worth_data
+            fuel_worth_data = result.fuel_worth_data
+            worth_data = result.worth_data
             color = self._colors[color_index % len(self._colors)]
             #sometime there isn't worth data
             # sometime there isn't worth data
@@ -1711,8 +1759,8 @@ class ResultsList(object):
 
         for result in self._results:
 
-            moderator_worth_data = result._moderator_worth_data
-            fuel_worth_data = result._fuel_worth_data
+            moderator_worth_data = result.moderator_worth_data
+            fuel_worth_data = result.fuel_worth_data
 
             #sometime there isn't worth data
             if fuel_worth_data and moderator_worth_data:
@@ -1897,7 +1945,7 @@ class ResultsList(object):
                 if time_base == "Prompt Neutron Lifetime":
 
                     prompt_neutron_lifetimes = full_data.getColumnData("neutron lifetime [s]")
-                    prompt_neutron_lifetime = float(prompt_neutron_lifetimes[0])
+                    prompt_neutron_lifetime = prompt_neutron_lifetimes[0]
 
                     times = [ time/prompt_neutron_lifetime for time in times]
 
@@ -2016,16 +2064,14 @@ class ResultsList(object):
 
             full_data = run.getSimulationData()
 
-            try:
-
-                values = [float(value) for value in full_data.getColumnData(column)]
-
-            except:
+            if not full_data.hasColumn(column):
 
                 print("column " + column + " not in " + label)
                 color_index = color_index + 1
                 continue
 
+            values = full_data.getColumnData(column)
+
             times = []
 
             if color_override is None:
@@ -2035,13 +2081,13 @@ class ResultsList(object):
 
             for time in full_data.getColumnData("Time [s]"):
 
-                if float(time) == 0.0 and xscale == "log":
+                if time == 0.0 and xscale == "log":
 
                     times.append(log_start_time/2.0)
 
                 else:
 
-                    times.append(float(time))
+                    times.append(time)
 
             if nominalized:
                 values = [ value/values[0] for value in values]
@@ -2051,13 +2097,13 @@ class ResultsList(object):
 
             if time_base == "Prompt Neutron Lifetime":
                 prompt_neutron_lifetimes = full_data.getColumnData("neutron lifetime [s]")
-                prompt_neutron_lifetime = float(prompt_neutron_lifetimes[0])
+                prompt_neutron_lifetime = prompt_neutron_lifetimes[0]
 
-                times = [ float(time) / prompt_neutron_lifetime for time in times]
+                times = [ time / prompt_neutron_lifetime for time in times]
 
             if not uncertainty_column is None:
 
-                values_error = [float(error) for error in full_data.getColumnData(uncertainty_column)]
+                values_error = full_data.getColumnData(uncertainty_column)
 
                 if nominalized:
                     values_error = [ error/values[0] for error in values_error]
@@ -2215,37 +2261,13 @@ class ResultsList(object):
                 temperatures[run_name] = [0]
                 continue
 
+            # ( field x time x node ) values of the run
             microcell_data = synced_data[run_name]["microcell-temperature"]
-            index = 0
-
-            position_key = 'Position-' + str(index) + " [m]"
-            temperature_key = 'Temperature-' + str(index) + " [K]"
-            integrated_power_key = 'Integrated-Power-' + str(index) + " [W-s]"
-            current_power_key = 'Current-Power-' + str(index) + " [W]"
-
-            temperatures[run_name] = []
-            positions[run_name] = []
-
-            while position_key in microcell_data:
-
-                positions[run_name].append(microcell_data[position_key][time_index])
-                temperatures[run_name].append(microcell_data[temperature_key][time_index])
-                #current_power = run._microcell_temperature.getColumnData(current_power_key)
-                #integrated_power = run._microcell_temperature.getColumnData(integrated_power_key)
-
-                index += 1
-
-                position_key = 'Position-' + str(index) + " [m]"
-                temperature_key = 'Temperature-' + str(index) + " [K]"
-                integrated_power_key = 'Integrated-Power-' + str(index) + " [W-s]"
-                current_power_key = 'Current-Power-' + str(index) + " [W]"
-
-            max_position = max(positions[run_name])
-            relative_positions = [100.0 * position / max_position for position in positions[run_name]]
-
-            positions[run_name] = relative_positions
 
+            node_positions = microcell_data[CSVClasses.MicrocellData.getFieldIndex("position"), time_index]
 
+            positions[run_name] = 100.0 * node_positions / node_positions.max()
+            temperatures[run_name] = microcell_data[CSVClasses.MicrocellData.getFieldIndex("temperature"), time_index]
 
         return [positions, temperatures]
 
@@ -2267,8 +2289,8 @@ class ResultsList(object):
 
             # Many points with temperatures
             else:
-                max_position = max(synced_data[run_name]['positions'])
-                relative_positions = [100.0 * position / max_position for position in synced_data[run_name]['positions']]
+                run_positions = synced_data[run_name]['positions']
+                relative_positions = 100.0 * run_positions / run_positions.max()
 
                 positions[run_name] = relative_positions
 
@@ -2441,32 +2463,25 @@ class ResultsList(object):
         energy_values = {}
         energy_uncertainty = {}
 
-        tally_key_space = ""
-
         #for each run
         for run_name in self._labels:
 
+            #ignore the time key
+            if run_name == 'time':
+                continue
+
+            # tally names are stored without the leading space older builds wrote
+            run_tallies = synced_data[run_name]['tallies']
+
             if cell > 1:
 
                 # create the tally key
-                tally_key = tally_key_space + type + "-" + str(zone) + "-" + str(cell)
+                tally_key = type + "-" + str(zone) + "-" + str(cell)
 
-                #ignore the time key
-                if run_name == 'time':
+                if not tally_key in run_tallies:
                     continue
 
-                if not tally_key in synced_data[run_name]['tallies']:
-
-                    # in older builds there were spaces in the tally key index
-                    tally_key = " " + tally_key
-
-                    if not tally_key in synced_data[run_name]['tallies']:
-                        continue
-
-                    else:
-                       tally_key_space = " "
-
-                tally_data = synced_data[run_name]['tallies'][tally_key]
+                tally_data = run_tallies[tally_key]
 
             else:
 
@@ -2474,31 +2489,21 @@ class ResultsList(object):
                 # create the tally key
                 tally_key = type + "-" + str(zone) + "-" + str(1)
 
-                # ignore the time key
-                if run_name == 'time':
+                if not tally_key in run_tallies:
                     continue
 
-                if not tally_key in synced_data[run_name]['tallies']:
-
-                    #in older builds there were spaces in the tally key index
-                    tally_key = " " + tally_key
-
-                    if not tally_key in synced_data[run_name]['tallies']:
-                        continue
-
-                    else:
-                        tally_key_space = " "
-
-                tally_data = synced_data[run_name]['tallies'][tally_key]
+                # sum the cells of the zone into copies so the synced data isn't modified
+                [energy_bins_data, value_data, sigma_data] = run_tallies[tally_key]
+                tally_data = [ energy_bins_data, [ list(values) for values in value_data ], [ list(sigmas) for sigmas in sigma_data ] ]
 
                 current_cell = 2
 
                 # create the tally key
-                tally_key = tally_key_space + type + "-" + str(zone) + "-" + str(current_cell)
+                tally_key = type + "-" + str(zone) + "-" + str(current_cell)
 
-                while tally_key in synced_data[run_name]['tallies']:
+                while tally_key in run_tallies:
 
-                    zipped_tallies = zip(tally_data[2], synced_data[run_name]['tallies'][tally_key][2], tally_data[1], synced_data[run_name]['tallies'][tally_key][1])
+                    zipped_tallies = zip(tally_data[2], run_tallies[tally_key][2], tally_data[1], run_tallies[tally_key][1])
 
                     zip_index = 0
                     for zip_tally in zipped_tallies:
@@ -2517,7 +2522,7 @@ class ResultsList(object):
 
                         zip_index += 1
                     current_cell += 1
-                    tally_key = tally_key_space + type + "-" + str(zone) + "-" + str(current_cell)
+                    tally_key = type + "-" + str(zone) + "-" + str(current_cell)
 
             times = synced_data[run_name]['time']
             number_timesteps_in_run = len(times)
@@ -2644,12 +2649,7 @@ class ResultsList(object):
 
             if not tally_key in synced_data[run_name]['tallies']:
 
-                #older runs have a space in the tally key
-                tally_key = " " + tally_key
-
-                if not tally_key in synced_data[run_name]['tallies']:
-
-                    continue
+                continue
 
             tally_values = synced_data[run_name]['tallies'][tally_key][1]
             starting_total = sum(tally_values[0])
@@ -1,10 +1,21 @@
 from pylab import *
-from scipy import interpolate
 import re
 import os
 import numpy
 import sqlite3
 import csv
+import itertools
+import CSVClasses
+import Schemas
+import TimeSeries
+
+# Connection settings while a tally database is being filled. The database is only a cache of the csv files, so a
+# crash half way through costs a rebuild rather than data and there's no point in syncing every page to disk
+BULK_LOAD_PRAGMAS = [ ["journal_mode", "MEMORY"], ["synchronous", "OFF"], ["cache_size", "-65536"] ]
+
+# The layout of the tally tables, kept in the user_version of run-data.db. Version 0 databases hold the tally name,
+# zone and cell of every row in the Tallies table along with the time as text, TallyData.migrateSchema upgrades them.
+TALLY_SCHEMA_VERSION = 1
 
 
 class SQLLiteObject(object):
@@ -97,6 +108,9 @@ class SQLLiteObject(object):
 
         return_data = []
 
+        # the table columns were created from the stripped csv headers
+        column = column.strip()
+
         if column in self._keys:
 
             command = "SELECT \"%s\" FROM \"%s\"" % (column, self._table_name)
@@ -121,6 +135,10 @@ class SQLLiteObject(object):
 
 class TimeBasedSQLLiteObject(SQLLiteObject):
 
+    """
+    :type _time_series: TimeSeries.TimeSeries
+    """
+
     def __init__\
     (
         self,
@@ -138,50 +156,36 @@ class TimeBasedSQLLiteObject(SQLLiteObject):
             database_file,
             base_csv
         )
-        self._time_column = time_column
+        self.time_column = time_column
 
-        self._interpolate_function = {}
+        # each column is read from the table once and resampled by the same engine as the csv data
+        self._column_arrays = {}
+        self._time_series = TimeSeries.TimeSeries(time_column, self.getColumnArray)
 
-        for column in self._keys:
+    def getColumnArray(self, column):
 
-            self._interpolate_function[column] = False
+        """
+        A column of the table as floats, cells that aren't numbers are reported and become nan
 
-    def getInterpolatedDataTimeSeries(self, time_array, column):
-
-
-        if self._interpolate_function[column] == False:
+        :rtype: numpy.ndarray
+        """
 
-            raw_time, raw_value = self.getRawDataTimeSeries(column)
+        column = column.strip()
 
-            #extending the interpolation to infinity
-            record_time = [0] + raw_time + [1e100]
-            record_value = [raw_value[0]] + raw_value + [raw_value[-1]]
+        if not column in self._column_arrays:
 
-            self._interpolate_function[column] = interpolate.interp1d(record_time, record_value)
+            raw_values = [ "" if value is None else value for value in self.getColumnData(column) ]
+            self._column_arrays[column] = CSVClasses.parseColumn(raw_values, numpy.float64, location=[self._db_path, column, 0])
 
+        return self._column_arrays[column]
 
-        interpolated_values = self._interpolate_function[column](time_array)
+    def getInterpolatedDataTimeSeries(self, time_array, column):
 
-        return interpolated_values
+        return self._time_series.interpolatedArray(time_array, [column])[:, 0]
 
     def getRawDataTimeSeries(self, column):
 
-        time_array = [ float(time) for time in self.getColumnData(self.time_column)]
-
-        value_array = []
-
-        for value in self.getColumnData(column): #type: str
-
-            try:
-
-                value_array.append(float(value))
-
-            except:
-
-                value_array.append(0.0)
-
-
-        return [time_array, value_array]
+        return self._time_series.getRawDataTimeSeries(column)
 
 
 
@@ -189,23 +193,15 @@ class TimeBasedSQLLiteObject(SQLLiteObject):
 
         if keys == None:
 
-            keys = self.keys
+            keys = self._keys
 
-        values = {}
-
-        for column in keys:
-
-            trimmed_whitespace_column = column.strip()
-            values[trimmed_whitespace_column] = self.getInterpolatedDataTimeSeries(time_array,column)
-
-        return values
+        return self._time_series.interpolatedData(time_array, keys)
 
     def getEndingTime(self):
 
-        time_array = self.getColumnData(self._time_column)
-        return float(time_array[-1])
+        return self._time_series.getEndingTime()
 
-    def getFixedTimeData(self,time_array, keys=[]):
+    def getFixedTimeData(self,time_array, keys=None):
 
         return self.interpolatedData(time_array,keys)
 
@@ -218,41 +214,45 @@ class SingleTally:
 
     _tally_data = None
     _tally_name = None
+    _tally_id = None
+    _tally_total = None
 
 
     def __init__\
     (
         self,
         tally_data,
-        tally_name : unicode
+        tally_name : unicode,
+        tally_id : int
     ):
         self._tally_name = tally_name
         self._tally_data = tally_data
+        self._tally_id = tally_id
+        self._tally_total = None
 
     #Return Monoenergetic tally values and error for all times
     def getTallyTotal(self):
 
-        tally_totals = []
-        tally_sigmas = []
-        tally_time =   []
-        #for time in times:
+        """
+        The total over the groups at every tally time, the last row written for a time when the csv repeats it. Read
+        once per tally, TallyData makes new SingleTally objects when it picks up new rows.
 
-        command = "SELECT \"value\",\"error\",\"time\" FROM %s WHERE tally=\"%s\" AND \"group\"=%g ORDER BY time * 1" % ( self._tally_data._table_name, self._tally_name, -1 )
-        print(command)
-        data = self._tally_data._db_exe.execute(command)
+        :return: [ times, values, sigmas ] arrays, shared between calls so they shouldn't be modified
+        :rtype: list[numpy.ndarray]
+        """
 
-        for row in data: #self._tally_data._db_exe.fetchone()
+        if self._tally_total is None:
 
-            time = row[2]
+            command = "SELECT \"time\",\"value\",\"error\" FROM \"%s\" WHERE rowid IN " \
+                      "(SELECT MAX(rowid) FROM \"%s\" WHERE tally_id=? AND \"group\"=-1 GROUP BY \"time\") ORDER BY \"time\"" \
+                      % (self._tally_data._table_name, self._tally_data._table_name)
 
-            if not time in tally_time:
-                tally_totals.append(row[0])
-                tally_sigmas.append(row[1])
-                tally_time.append(row[2])
+            data = self._tally_data._db_exe.execute(command, (self._tally_id,)).fetchall()
+            data = numpy.array(data, dtype=numpy.float64).reshape(-1, 3)
 
-        # turn the time strings into floats
-        tally_time = [ float(time) for time in tally_time ]
-        return [ tally_time, tally_totals, tally_sigmas]
+            self._tally_total = [ data[:, 0], data[:, 1], data[:, 2] ]
+
+        return self._tally_total
 
 
 
@@ -287,34 +287,12 @@ class SingleTally:
 
     def getFixedTimeData(self,time_array):
 
-        all_energy_bins = []
-        all_energy_values = []
-        all_energy_sigmas = []
-
-        for current_time in time_array:
+        """
+        :return: the energy bins of each time and the ( time x group ) values and errors at the closest tally times
+        :rtype: list
+        """
 
-            current_energy_bin = self._tally_data._energies
-            current_energy_values = []
-            current_energy_sigmas = []
-            adjusted_time = self._tally_data.getClosestTime(current_time)
-
-            command = "SELECT \"time\",\"group\",\"error\", \"value\" FROM \"%s\" WHERE tally = \"%s\" AND \"group\" >= 0 AND time=\"%s\" ORDER BY \"group\" LIMIT %g" \
-                      % (self._tally_data._table_name, self._tally_name, adjusted_time, len(current_energy_bin))
-
-            print(command)
-            tally_data = self._tally_data._db_exe.execute(command)
-
-            for time, group, error, value in tally_data:
-
-                current_energy_values.append(value)
-                current_energy_sigmas.append(error)
-
-            all_energy_bins.append(current_energy_bin)
-            all_energy_values.append(current_energy_values)
-            all_energy_sigmas.append(current_energy_sigmas)
-
-
-        return [ all_energy_bins, all_energy_values, all_energy_sigmas ]
+        return self._tally_data.getFixedTimeData(time_array, [self._tally_name])[self._tally_name]
 
 class TallyData(SQLLiteObject):
 
@@ -326,11 +304,16 @@ class TallyData(SQLLiteObject):
     _times = None
     _tallies = None
     _tally_names = None
+    _tally_ids = None
+    _ingest_revision = 0
+    _ingest_offset_recorded = False
 
 
     """
     :type _tallies: dict[SingleTally]
     :type _energies: List[float]
+    :type _times: numpy.ndarray
+    :type _tally_ids: dict[unicode, int]
     """
 
     def __init__ \
@@ -343,9 +326,10 @@ class TallyData(SQLLiteObject):
     ):
 
         self._energies = []
-        self._times = []
+        self._times = numpy.empty(0)
         self._tallies = {}
         self._tally_names = set()
+        self._ingest_revision = 0
 
 
         super(TallyData, self).__init__ \
@@ -356,16 +340,56 @@ class TallyData(SQLLiteObject):
             base_csv
         )
 
+        self.migrateSchema()
+        self.readTallyIds()
 
+        # catch up with rows written since the database was last updated
+        self.ingestNewRows()
         self.initialzeData()
 
     def getClosestTime(self,time):
 
-        adjusted_time = [ abs( float(single_time) - time ) for single_time in self._times ]
-        closest_adjusted_time = min( adjusted_time)
-        index = adjusted_time.index(closest_adjusted_time)
-        matching_time = self._times[index]
-        return matching_time
+        return self.snapTimes([time])[0]
+
+    def snapTimes(self, time_array, snap="nearest"):
+
+        """
+        Snap every time onto the tally times, the "nearest" one (the earlier one on a tie), the "previous" one or the
+        "next" one. Times outside of the record snap to its first or last time.
+
+        :type snap: str
+        :rtype: numpy.ndarray
+        """
+
+        if len(self._times) == 0:
+
+            raise Exception("No tally times in %s" % self._db_path)
+
+        time_array = numpy.asarray(time_array, dtype=numpy.float64)
+        last_time = len(self._times) - 1
+
+        if snap == "previous":
+
+            return self._times[numpy.clip(numpy.searchsorted(self._times, time_array, side='right') - 1, 0, last_time)]
+
+        if snap == "next":
+
+            return self._times[numpy.clip(numpy.searchsorted(self._times, time_array, side='left'), 0, last_time)]
+
+        if snap != "nearest":
+
+            raise Exception("Unknown time snapping " + snap)
+
+        if last_time == 0:
+
+            return numpy.full(len(time_array), self._times[0])
+
+        upper = numpy.clip(numpy.searchsorted(self._times, time_array, side='left'), 1, last_time)
+        lower = upper - 1
+
+        nearest = numpy.where(numpy.abs(time_array - self._times[lower]) <= numpy.abs(self._times[upper] - time_array), lower, upper)
+
+        return self._times[nearest]
 
     def process_csv_file(self):
 
@@ -374,115 +398,394 @@ class TallyData(SQLLiteObject):
             print("%s csv doesn't exist." % (self._csv_path))
             raise
 
-        # Create the table
-        self._db_exe.execute("CREATE TABLE IF NOT EXISTS \"%s\" ('tally' text, 'zone' integer, 'cell' integer, 'time' text, 'group' integer,  'value' real, 'error' real) " % ( self._table_name))
-        self._db_exe.execute("CREATE INDEX time_index ON \"%s\"(time)" % self._table_name)
-        self._db_exe.execute("CREATE INDEX name_index ON \"%s\"(tally)" % self._table_name)
+        # Create the tables, the rows and the indexes are added by ingestNewRows
+        self.createTables()
+        self._db_exe.execute("PRAGMA user_version = %d" % TALLY_SCHEMA_VERSION)
+        self._db_conn.commit()
 
-        # second figure out how many cells and zones there are
-        self._number_zones = 1
-        self._number_cells = 1
+    def createTables(self):
 
-        with open(self._csv_path, 'r') as csv_file_object:
+        """
+        TallyNames is the dimension table of the tallies, the Tallies rows refer to it by tally_id
+        """
 
-            csv_data = csv.DictReader(csv_file_object, delimiter=',')
+        self._db_exe.execute("CREATE TABLE IF NOT EXISTS TallyNames ('tally_id' integer PRIMARY KEY, 'tally' text UNIQUE, 'type' text, 'zone' integer, 'cell' integer)")
+        self._db_exe.execute("CREATE TABLE IF NOT EXISTS \"%s\" ('tally_id' integer, 'time' real, 'group' integer, 'value' real, 'error' real)" % self._table_name)
 
-            # Here we are recovering the energy bin bounds which will be the same for all tallies############################
-            energy_matches = []
+    def createIndexes(self):
 
-            keys = csv_data.fieldnames
+        # covers the lookups of a tally by group and time without touching the table rows
+        self._db_exe.execute("CREATE INDEX IF NOT EXISTS tally_index ON \"%s\"(tally_id, \"group\", time, value, error)" % self._table_name)
+        self._db_exe.execute("CREATE INDEX IF NOT EXISTS time_index ON \"%s\"(time)" % self._table_name)
 
-            first_row = next(csv_data)
+    def migrateSchema(self):
 
-            # For some of the older data sets there is a space in the time and or name columns
-            if self._name_column not in keys:
-                self._name_column = " " + self._name_column
+        """
+        Upgrade a version 0 database in place. Its ingest offset was recorded without a signature, so nothing tells
+        whether the rows still match the csv: the old tables are dropped and the csv is ingested again into the new
+        ones.
+        """
 
-            if self._time_column not in keys:
-                self._time_column = " " + self._time_column
+        if self._db_exe.execute("PRAGMA user_version").fetchone()[0] >= TALLY_SCHEMA_VERSION:
 
+            return
 
-            #grab all energy bin differentiation
-            for key in keys:
+        print("Upgrading the %s table of %s to version %d" % (self._table_name, self._db_path, TALLY_SCHEMA_VERSION))
 
-                matches = re.match("Energy-([0-9]+) \[MeV\][ ]?$", key)
+        self._db_exe.execute("BEGIN")
 
-                if matches:
-                    group = int(matches.group(1))
-                    energy_matches.append(group)
+        try:
 
+            self._db_exe.execute("DROP TABLE \"%s\"" % self._table_name)
+            self._db_exe.execute("DROP TABLE IF EXISTS IngestState")
+            self.createTables()
+            self._db_exe.execute("PRAGMA user_version = %d" % TALLY_SCHEMA_VERSION)
 
+        except:
 
-            # for each row in the tally data
-            for row in csv_data:
+            self._db_conn.rollback()
+            raise
 
-                zone_cell = row[self._name_column]
-                matches = re.match("^[ ]?((Fission-Rate)|(Absorption-Rate)|(Capture-Rate))-([0-9]+)-([0-9]+)$", zone_cell)
+        self._db_conn.commit()
 
-                if not matches:
-                    matches = re.match("^[ ]?((Flux)|(Fission)|(Absorption))-([0-9]+)-([0-9]+)$", zone_cell)
+        self._keys = [ row[1] for row in self._db_exe.execute("PRAGMA table_info(%s)" % self._table_name) ]
 
-                try:
-                    zone = int(matches.group(5))
-                    cell = int(matches.group(6))
-                    tally = matches.group(1)
+    def readTallyIds(self):
 
-                    # Some of the older tally files use Absorption when we want absorption rate
-                    if tally == "Absorption":
-                        tally = "Capture-Rate"
+        self._tally_ids = {}
 
+        for tally_id, tally_name in self._db_exe.execute("SELECT tally_id, tally FROM TallyNames"):
 
+            self._tally_ids[tally_name] = tally_id
 
-                except:
+    def getTallyId(self, zone_cell):
 
-                    print("No zone cell data for tally" + zone_cell)
-                    raise
+        """
+        The id of the tally named zone_cell in the csv, added to TallyNames the first time it's seen
 
-                # for the tallies that have changed name
-                tally_current_name = tally + "-" + str(zone) + "-" + str(cell)
+        :type zone_cell: unicode
+        :rtype: int
+        """
 
-                value = float(row['Value'])
-                sigma = float(row['Sigma'])
-                time = float( row[self._time_column])
+        tally_name_row = self.parseTallyName(zone_cell)
+        tally_current_name = tally_name_row[0]
 
-                #insert the initial value
-                command = "INSERT INTO \"%s\" VALUES ('%s', %g, %g, %s, %g, %e, %e)" % (self._table_name, tally_current_name, zone, cell, time, -1, value, sigma)
-                self._db_exe.execute(command)
+        if not tally_current_name in self._tally_ids:
+
+            self._db_exe.execute("INSERT INTO TallyNames ('tally', 'type', 'zone', 'cell') VALUES (?, ?, ?, ?)", tally_name_row)
+            self._tally_ids[tally_current_name] = self._db_exe.lastrowid
+
+        return self._tally_ids[tally_current_name]
+
+    def setPragmas(self, pragmas):
+
+        """
+        :type pragmas: list[list[str]]
+        :return: the previous values of the pragmas
+        :rtype: list[list[str]]
+        """
+
+        previous_pragmas = []
+
+        for [pragma, value] in pragmas:
+
+            previous_pragmas.append([pragma, str(self._db_exe.execute("PRAGMA %s" % pragma).fetchone()[0])])
+            self._db_exe.execute("PRAGMA %s = %s" % (pragma, value))
+
+        return previous_pragmas
+
+    def getIngestOffset(self):
+
+        """
+        The byte offset in the tally csv up to which rows are already in the table
+
+        :rtype: int
+        """
+
+        self._db_exe.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='IngestState'")
+        ingest_state_existed = self._db_exe.fetchone() is not None
+
+        # The database sits next to the csv, so the offset is kept under the csv file name rather than its path, which
+        # depends on how the run folder was reached
+        self._db_exe.execute("CREATE TABLE IF NOT EXISTS IngestState ('file' text PRIMARY KEY, 'offset' integer, 'signature' text)")
+
+        # the signature was added after the offset
+        if not "signature" in [ column[1] for column in self._db_exe.execute("PRAGMA table_info(IngestState)") ]:
+
+            self._db_exe.execute("ALTER TABLE IngestState ADD COLUMN 'signature' text")
+            self._db_conn.commit()
+
+        self._db_exe.execute("SELECT \"offset\", signature FROM IngestState WHERE \"file\"=?", (self.getIngestKey(),))
+        row = self._db_exe.fetchone()
+
+        if row is not None:
+
+            [offset, signature] = row
+
+            if signature is not None and signature == self.getCSVSignature(offset):
+
+                self._ingest_offset_recorded = True
+                return offset
+
+            # A run restarted in place rewrites the csv, the rows read from the old one are thrown away
+            print("%s changed since it was read into %s" % (self._csv_path, self._db_path))
+            self.clearTallies()
+            return 0
+
+        # Without a recorded offset there's no telling how much of the csv the rows cover, so they're read again
+        if ingest_state_existed:
+
+            self.clearTallies()
+            return 0
+
+        # Databases written before the offset was recorded either never committed their rows, in which case everything
+        # is read again, or hold the whole csv as it was up to its last complete row
+        self._db_exe.execute("SELECT COUNT(*) FROM \"%s\"" % self._table_name)
+
+        if self._db_exe.fetchone()[0] == 0:
+
+            return 0
+
+        with open(self._csv_path, 'rb') as csv_file_object:
+
+            size = csv_file_object.seek(0, os.SEEK_END)
+            tail_start = csv_file_object.seek(max(0, size - 65536))
+
+            return tail_start + csv_file_object.read().rfind(b"\n") + 1
+
+    def getIngestKey(self):
+
+        return os.path.basename(self._csv_path)
+
+    def getCSVSignature(self, offset):
+
+        return CSVClasses.getCSVSignature(self._csv_path, offset)
 
+    def recordIngestOffset(self, offset):
 
-                for group_index in range( len(energy_matches)):
+        self._db_exe.execute("INSERT OR REPLACE INTO IngestState VALUES (?, ?, ?)", (self.getIngestKey(), offset, self.getCSVSignature(offset)))
 
-                    value = float(row['value-' + str(group_index)])
-                    sigma = float(row['sigma-' + str(group_index)])
-                    time = float(row[self._time_column])
+    def clearTallies(self):
 
-                    if group_index == 999:
-                        pass
+        """
+        Empty the tally tables so the csv is ingested again from its start
+        """
 
+        print("Reading %s into %s again" % (self._csv_path, self._db_path))
 
-                    # insert the initial value
-                    command = "INSERT INTO \"%s\" VALUES ('%s', %g, %g, %s, %g, %e, %e)" % (
-                    self._table_name, tally_current_name, zone, cell, time, group_index, value, sigma)
-                    self._db_exe.execute(command)
+        self._db_exe.execute("DELETE FROM \"%s\"" % self._table_name)
+        self._db_exe.execute("DELETE FROM TallyNames")
+        self._db_exe.execute("DELETE FROM IngestState WHERE \"file\"=?", (self.getIngestKey(),))
+        self._db_conn.commit()
 
-                    #print(command)
+        self._tally_ids = {}
+        self._ingest_revision += 1
+
+    def ingestNewRows(self):
+
+        """
+        Insert the complete rows written to the tally csv since the last ingest and record how far we got
+
+        :return: number of csv rows added
+        :rtype: int
+        """
+
+        self._ingest_offset_recorded = False
+        offset = self.getIngestOffset()
+
+        # The csv is streamed a chunk at a time so a large tally file is never held in memory as a whole
+        chunks = CSVClasses.readCSVLineChunks(self._csv_path, offset)
+
+        for [keys, rows, new_offset] in chunks:
+
+            if len(rows) > 0:
+
+                break
+
+        else:
+
+            # keep an offset that was guessed or reset, or the next open won't know what the rows cover
+            if not self._ingest_offset_recorded:
+
+                self.recordIngestOffset(new_offset)
+                self._db_conn.commit()
+
+            return 0
+
+        # Older data sets have spaces around some of the column names, so rows are looked up through the stripped names
+        column_index = CSVClasses.getColumnIndex(keys)
+        Schemas.getFileSchema("tallydata.csv").checkRequiredColumns(list(column_index), self._csv_path)
+
+        # Here we are recovering the energy bin bounds which will be the same for all tallies############################
+        energy_matches = []
+
+        #grab all energy bin differentiation
+        for key in column_index:
+
+            matches = re.match("Energy-([0-9]+) \[MeV\]$", key)
+
+            if matches:
+                group = int(matches.group(1))
+                energy_matches.append(group)
+
+
+        previous_pragmas = self.setPragmas(BULK_LOAD_PRAGMAS)
+
+        # All the rows go in as one transaction, the indexes are built once they're loaded rather than kept up to date
+        # row by row, and the offset is only recorded along with the rows
+        self._db_exe.execute("BEGIN")
+
+        number_rows = 0
+
+        try:
+
+            # the tally ids of the csv names, so the rows don't each parse their name
+            name_column = column_index[self._name_column]
+            tally_ids = {}
+
+            command = "INSERT INTO \"%s\" VALUES (?, ?, ?, ?, ?)" % self._table_name
+
+            for [keys, rows, new_offset] in itertools.chain([ [keys, rows, new_offset] ], chunks):
+
+                for zone_cell in set( row[name_column] for row in rows ):
+
+                    if not zone_cell in tally_ids:
+
+                        tally_ids[zone_cell] = self.getTallyId(zone_cell)
+
+                self._db_exe.executemany(command, self.generateTableRows(rows, column_index, energy_matches, tally_ids))
+                number_rows += len(rows)
+
+            self.createIndexes()
+            self.recordIngestOffset(new_offset)
+
+        except:
+
+            self._db_conn.rollback()
+            raise
+
+        finally:
+
+            chunks.close()
+
+            if self._db_conn.in_transaction:
+
+                self._db_conn.commit()
+
+            self.setPragmas(previous_pragmas)
+
+        self._ingest_revision += 1
+
+        return number_rows
+
+    def generateTableRows(self, rows, column_index, energy_matches, tally_ids):
+
+        """
+        The table rows of the csv rows, one per csv row for the total over the groups and one per energy group
+
+        :type rows: list[list[str]]
+        :type column_index: dict[str, int]
+        :type energy_matches: list[int]
+        :type tally_ids: dict[unicode, int]
+        :rtype: collections.Iterable[tuple]
+        """
+
+        for row in rows:
+
+            for table_row in self.getTableRows(row, column_index, energy_matches, tally_ids):
+
+                yield table_row
+
+    def parseTallyName(self, zone_cell):
+
+        """
+        :type zone_cell: unicode
+        :return: the current name, type, zone and cell of the tally named zone_cell in the csv
+        :rtype: list
+        """
+
+        matches = re.match("^[ ]?((Fission-Rate)|(Absorption-Rate)|(Capture-Rate))-([0-9]+)-([0-9]+)$", zone_cell)
+
+        if not matches:
+            matches = re.match("^[ ]?((Flux)|(Fission)|(Absorption))-([0-9]+)-([0-9]+)$", zone_cell)
+
+        try:
+            zone = int(matches.group(5))
+            cell = int(matches.group(6))
+            tally = matches.group(1)
+
+            # Some of the older tally files use Absorption when we want absorption rate
+            if tally == "Absorption":
+                tally = "Capture-Rate"
+
+
+
+        except:
+
+            print("No zone cell data for tally" + zone_cell)
+            raise
+
+        # for the tallies that have changed name
+        tally_current_name = tally + "-" + str(zone) + "-" + str(cell)
+
+        return [tally_current_name, tally, zone, cell]
+
+    def getTableRows(self, row, column_index, energy_matches, tally_ids):
+
+        tally_id = tally_ids[row[column_index[self._name_column]]]
+
+        value = float(row[column_index['Value']])
+        sigma = float(row[column_index['Sigma']])
+        time = float( row[column_index[self._time_column]])
+
+        # the total over the groups goes in as group -1
+        table_rows = [ (tally_id, time, -1, value, sigma) ]
+
+        for group_index in range( len(energy_matches)):
+
+            value = float(row[column_index['value-' + str(group_index)]])
+            sigma = float(row[column_index['sigma-' + str(group_index)]])
+
+            table_rows.append( (tally_id, time, group_index, value, sigma) )
+
+        return table_rows
+
+    def refresh(self):
+
+        """
+        Pick up the tally rows a running simulation wrote since the data was loaded
+        """
+
+        ingest_revision = self._ingest_revision
+        self.ingestNewRows()
+
+        # the tables changed, either by new rows or by being emptied for the csv to be read again
+        if self._ingest_revision != ingest_revision:
+
+            self.initialzeData()
 
 
     def initialzeData(self):
 
+        self._energies = []
+        self._times = numpy.empty(0)
+        self._tallies = {}
+        self._tally_names = set()
+
         with open(self._csv_path, 'r') as csv_file_object:
 
-            csv_data = csv.DictReader(csv_file_object, delimiter=',')
+            csv_data = csv.reader(csv_file_object, delimiter=',')
 
             # Here we are recovering the energy bin bounds which will be the same for all tallies############################
             energy_matches = []
-            keys = csv_data.fieldnames
-            first_row = next(csv_data)
+            # a restarted run may have left nothing but the header so far
+            column_index = CSVClasses.getColumnIndex(next(csv_data, []))
+            first_row = next(csv_data, None)
 
             # grab all energy bin differentiation
-            for key in keys:
+            for key in column_index:
 
-                matches = re.match("Energy-([0-9]+) \[MeV\][ ]?$", key)
+                matches = re.match("Energy-([0-9]+) \[MeV\]$", key)
 
                 if matches:
                     group = int(matches.group(1))
@@ -490,50 +793,87 @@ class TallyData(SQLLiteObject):
 
             energy_matches.sort()
 
+            if first_row is None:
+
+                energy_matches = []
 
             for energy_match in energy_matches:
                 key = "Energy-" + str(energy_match) + " [MeV]"
-                value = float(first_row[key])
+                value = float(first_row[column_index[key]])
                 self._energies.append(value)
 
 
 
-        command = "SELECT DISTINCT(tally) FROM \"%s\"" % self._table_name
-        data = self._db_exe.execute(command)
-
-
-        for tally_name, in data:
+        for tally_name in self._tally_ids:
             self._tally_names.add(tally_name)
-            tally = SingleTally(self,tally_name)
+            tally = SingleTally(self,tally_name,self._tally_ids[tally_name])
             self._tallies[tally_name] = tally
 
         command = "SELECT DISTINCT(\"time\") FROM \"%s\" ORDER BY \"time\"" % self._table_name
         data = self._db_exe.execute(command)
 
-        for time, in data:
-            self._times.append(time)
+        self._times = numpy.array([ time for time, in data ], dtype=numpy.float64)
 
 
-        command = "SELECT MAX(\"zone\") FROM \"%s\"" % self._table_name
+        command = "SELECT MAX(\"zone\"), MAX(\"cell\") FROM TallyNames"
         data = self._db_exe.execute(command)
-        self._number_zones, = data.fetchone()
+        self._number_zones, self._number_cells = data.fetchone()
 
-        command = "SELECT MAX(\"cell\") FROM \"%s\"" % self._table_name
-        data = self._db_exe.execute(command)
-        self._number_cells, = data.fetchone()
+    def getFixedTimeData(self,fixed_time_array, desired_keys = None, snap = "nearest"):
+
+        """
+        The energy group values and errors of the tallies at the tally times snapped from fixed_time_array, fetched for
+        all the tallies with a single query
 
-    def getFixedTimeData(self,fixed_time_array, desired_keys = None):
+        :type desired_keys: list[unicode] | None
+        :param snap: how the times are snapped onto the tally times, see snapTimes
+        :rtype: dict[unicode, list]
+        :return: [ energy bins of each time, ( time x group ) values, ( time x group ) errors ] keyed by tally name, nan
+                 where the table has no row
+        """
 
         #only use the keys we want to lookup
         if desired_keys is None:
 
             desired_keys = self._tallies
 
+        desired_keys = list(desired_keys)
+        tally_ids = [ self._tallies[key]._tally_id for key in desired_keys ]
+        number_groups = len(self._energies)
+
+        # the requested times share their closest tally times, each of which is fetched once
+        closest_times = self.snapTimes(fixed_time_array, snap)
+        [unique_times, time_rows] = numpy.unique(closest_times, return_inverse=True)
+
+        command = "SELECT tally_id, \"time\", \"group\", \"value\", \"error\" FROM \"%s\" WHERE tally_id IN (%s) AND \"group\" >= 0 AND \"group\" < ? AND time IN (%s) ORDER BY rowid" \
+                  % (self._table_name, ",".join(["?"] * len(tally_ids)), ",".join(["?"] * len(unique_times)))
+
+        table_rows = self._db_exe.execute(command, tally_ids + [number_groups] + unique_times.tolist()).fetchall()
+        table_rows = numpy.array(table_rows, dtype=numpy.float64).reshape(-1, 5)
+
+        # scatter the rows into ( tally x unique time x group ) arrays
+        values = numpy.full((len(tally_ids), len(unique_times), number_groups), numpy.nan)
+        errors = numpy.full((len(tally_ids), len(unique_times), number_groups), numpy.nan)
+
+        tally_index = numpy.searchsorted(numpy.sort(tally_ids), table_rows[:, 0])
+        tally_index = numpy.argsort(tally_ids)[tally_index]
+        time_index = numpy.searchsorted(unique_times, table_rows[:, 1])
+        group_index = table_rows[:, 2].astype(int)
+
+        # a restarted run can write a row again, the last one written wins as in SingleTally.getTallyTotal
+        cells = numpy.ravel_multi_index((tally_index, time_index, group_index), values.shape)
+        [cells, last_rows] = numpy.unique(cells[::-1], return_index=True)
+        last_rows = len(table_rows) - 1 - last_rows
+
+        values.flat[cells] = table_rows[last_rows, 3]
+        errors.flat[cells] = table_rows[last_rows, 4]
+
+        all_energy_bins = [ self._energies ] * len(closest_times)
         fixed_time_tally_data = {}
 
+        for key_index in range(len(desired_keys)):
 
-        for key in desired_keys:
-            fixed_time_tally_data[key] = self._tallies[key].getFixedTimeData(fixed_time_array)
+            fixed_time_tally_data[desired_keys[key_index]] = [ all_energy_bins, values[key_index][time_rows], errors[key_index][time_rows] ]
 
         return fixed_time_tally_data
 
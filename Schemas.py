@@ -0,0 +1,196 @@
+import re
+import numpy
+
+# How TimeBasedCSVDataObject resamples a column between its recorded times: "linear" interpolation, holding the
+# "previous" recorded value, taking the "next" recorded value, or the "nearest" one
+INTERPOLATION_MODES = [ "linear", "previous", "next", "nearest" ]
+
+
+class ColumnSchema(object):
+
+    """
+    The type and unit of a column, name is a regular expression when the schema describes a family of numbered columns
+
+    :type name: str
+    :type dtype: type
+    :type unit: str | None
+    :type required: bool
+    :type interpolation: str
+    """
+
+    def __init__(self, name, unit=None, dtype=numpy.float64, required=False, pattern=False, interpolation="linear"):
+
+        if not interpolation in INTERPOLATION_MODES:
+
+            raise Exception("Unknown interpolation mode " + interpolation + " for column " + name)
+
+        self.name = name
+        self.unit = unit
+        self.dtype = dtype
+        self.required = required
+        self.interpolation = interpolation
+        self._pattern = re.compile(name + "$") if pattern else None
+
+    def matches(self, column):
+
+        if self._pattern is None:
+
+            return column == self.name
+
+        return self._pattern.match(column) is not None
+
+
+class FileSchema(object):
+
+    """
+    Describes the columns of one kind of run file. Columns the schema doesn't name are parsed as float64 and cells that
+    can't be parsed are replaced by fill_value.
+
+    :type file_name: str
+    :type columns: list[ColumnSchema]
+    """
+
+    def __init__(self, file_name, columns, fill_value=numpy.nan):
+
+        self.file_name = file_name
+        self.columns = columns
+        self.fill_value = fill_value
+
+    def getColumnSchema(self, column):
+
+        """
+        :type column: str
+        :rtype: ColumnSchema | None
+        """
+
+        for column_schema in self.columns:
+
+            if column_schema.matches(column):
+
+                return column_schema
+
+        return None
+
+    def getDtype(self, column):
+
+        column_schema = self.getColumnSchema(column)
+
+        if column_schema is None:
+
+            return numpy.float64
+
+        return column_schema.dtype
+
+    def getUnit(self, column):
+
+        column_schema = self.getColumnSchema(column)
+
+        if column_schema is None:
+
+            return None
+
+        return column_schema.unit
+
+    def getInterpolation(self, column):
+
+        column_schema = self.getColumnSchema(column)
+
+        if column_schema is None:
+
+            return "linear"
+
+        return column_schema.interpolation
+
+    def getRequiredColumns(self):
+
+        return [ column_schema.name for column_schema in self.columns if column_schema.required ]
+
+    def checkRequiredColumns(self, headers, csv_file):
+
+        """
+        Raise if the stripped header of csv_file lacks any of the required columns
+
+        :type headers: list[str]
+        :type csv_file: str
+        """
+
+        missing_columns = [ column for column in self.getRequiredColumns() if not column in headers ]
+
+        if missing_columns:
+
+            raise Exception(csv_file + " is missing the required columns " + ", ".join(missing_columns))
+
+
+SCHEMAS = {
+
+    # The Monte Carlo quantities are averages over the batch ending at their recorded time, graphAttribute draws them
+    # as steps where="pre" and they're synced the same way. So are the reactivities derived from them.
+    "datafile.csv" : FileSchema("datafile.csv", [
+        ColumnSchema("Time [s]", "s", required=True),
+        ColumnSchema("Power [W/m^3]", "W/m^3"),
+        ColumnSchema("k_eff", interpolation="next"),
+        ColumnSchema("k_eff sigma", interpolation="next"),
+        ColumnSchema("Beta_eff", interpolation="next"),
+        ColumnSchema("Beta_eff sigma", interpolation="next"),
+        ColumnSchema("neutron lifetime [s]", "s", interpolation="next"),
+        ColumnSchema("Neutron Lifetime sigma [s]", "s", interpolation="next"),
+        ColumnSchema("Reactivity [pcm]", "pcm", interpolation="next"),
+        ColumnSchema("Reactivity \\[\\$\\]", "$", pattern=True, interpolation="next"),
+        ColumnSchema("Integrated Outward Power [W*s/m^3]", "W*s/m^3"),
+        ColumnSchema("Edge Temp [K]", "K"),
+        ColumnSchema("Run Time [s]", "s"),
+        ColumnSchema("Iteration"),
+        ColumnSchema("Group [0-9]+", pattern=True),
+    ]),
+
+    # every column besides the time is the temperature at the radial position [m] in its header
+    "temperature-data.csv" : FileSchema("temperature-data.csv", [
+        ColumnSchema("Time [s]", "s", required=True),
+        ColumnSchema("[-+0-9.eE]+", "K", pattern=True),
+    ]),
+
+    "microscale-aggregate-data.csv" : FileSchema("microscale-aggregate-data.csv", [
+        ColumnSchema("Time [s]", "s", required=True),
+        ColumnSchema("Position-[0-9]+ \\[m\\]", "m", pattern=True),
+        ColumnSchema("Temperature-[0-9]+ \\[K\\]", "K", pattern=True),
+        ColumnSchema("Integrated-Power-[0-9]+ \\[W-s\\]", "W-s", pattern=True),
+        ColumnSchema("Current-Power-[0-9]+ \\[W\\]", "W", pattern=True),
+    ]),
+
+    "tallydata.csv" : FileSchema("tallydata.csv", [
+        ColumnSchema("Name", dtype=str, required=True),
+        ColumnSchema("Time [s]", "s", required=True),
+        ColumnSchema("Value", required=True),
+        ColumnSchema("Sigma", required=True),
+        ColumnSchema("Energy-[0-9]+ \\[MeV\\]", "MeV", pattern=True),
+        ColumnSchema("value-[0-9]+", pattern=True),
+        ColumnSchema("sigma-[0-9]+", pattern=True),
+    ]),
+
+    "worth.csv" : FileSchema("worth.csv", [
+        ColumnSchema("Fuel Temperature [K]", "K", required=True),
+        ColumnSchema("K-eigenvalue", required=True),
+    ]),
+
+    "fuel-worth.csv" : FileSchema("fuel-worth.csv", [
+        ColumnSchema("Fuel Temperature [K]", "K", required=True),
+        ColumnSchema("K-eigenvalue", required=True),
+    ]),
+
+    "moderator-worth.csv" : FileSchema("moderator-worth.csv", [
+        ColumnSchema("Non Fissile Temperature [K]", "K", required=True),
+        ColumnSchema("K-eigenvalue", required=True),
+    ]),
+}
+
+
+def getFileSchema(datafile):
+
+    """
+    The schema of a run file by its name, None for files that aren't described
+
+    :type datafile: str
+    :rtype: FileSchema | None
+    """
+
+    return SCHEMAS.get(datafile)
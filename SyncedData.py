@@ -0,0 +1,122 @@
+import collections.abc
+
+
+class SyncedRunData(collections.abc.Mapping):
+
+    """
+    The data of one run interpolated onto a time grid. Each family of data is computed the first time it's looked up,
+    so views that never read the tallies or the microcell temperatures don't pay for syncing them.
+
+    Keys are "time", "data", "positions", "temperatures", "tallies" and "microcell-temperature", the latter being the
+    ( field x time x node ) array of CSVClasses.MicrocellData.getFixedTimeData.
+    """
+
+    families = [ "time", "data", "positions", "temperatures", "tallies", "microcell-temperature" ]
+
+    def __init__(self, result, time_array, columns=None):
+
+        """
+        :type result: Result.Result
+        :type columns: list[str] | None
+        :param columns: datafile columns to sync, all of them by default
+        """
+
+        self._result = result
+        self._time_array = [ time for time in time_array ]
+        self._columns = columns
+        self._synced = { "time" : self._time_array }
+
+    def __getitem__(self, family):
+
+        if not family in self._synced:
+
+            if family == "data":
+
+                self._synced["data"] = self._result.simulation_data.getFixedTimeData(self._time_array, self._columns)
+
+            elif family == "positions" or family == "temperatures":
+
+                [positions, all_temperatures] = self._result.temperature_data.getFixedTimeData(self._time_array)
+                self._synced["positions"] = positions
+                self._synced["temperatures"] = all_temperatures
+
+            elif family == "tallies":
+
+                self._synced["tallies"] = self.getOptionalData(self._result.tally_data)
+
+            elif family == "microcell-temperature":
+
+                self._synced["microcell-temperature"] = self.getOptionalData(self._result.microcell_temperature)
+
+            else:
+
+                raise KeyError(family)
+
+        return self._synced[family]
+
+    def getOptionalData(self, data_object):
+
+        # runs without the data get an empty list as they always have
+        if data_object:
+
+            return data_object.getFixedTimeData(self._time_array)
+
+        return []
+
+    def __contains__(self, family):
+
+        return family in self.families
+
+    def __iter__(self):
+
+        return iter(self.families)
+
+    def __len__(self):
+
+        return len(self.families)
+
+
+class SyncedData(collections.abc.Mapping):
+
+    """
+    Every run of a ResultsList synced onto a shared time grid, keyed by run folder name, with the grid itself under
+    "time". The run data is computed lazily by SyncedRunData.
+    """
+
+    def __init__(self, results, time_array, columns=None):
+
+        """
+        :type results: list[Result.Result]
+        """
+
+        self._runs = collections.OrderedDict()
+
+        for result in results:
+
+            self._runs[result.getFolderName()] = SyncedRunData(result, time_array, columns)
+
+        self._time_array = time_array
+
+    def __getitem__(self, name):
+
+        if name == "time":
+
+            return self._time_array
+
+        return self._runs[name]
+
+    def __contains__(self, name):
+
+        return name == "time" or name in self._runs
+
+    def __iter__(self):
+
+        for name in self._runs:
+
+            yield name
+
+        yield "time"
+
+    def __len__(self):
+
+        return len(self._runs) + 1
@@ -0,0 +1,186 @@
+import collections
+import numpy
+
+# How many stacked column sets a TimeSeries keeps ready for resampling
+TIME_SERIES_CACHE_SIZE = 16
+
+
+def padTable(raw_time, raw_values):
+
+    """
+    Extend recorded ( time x column ) values into an interpolation table running from 0 to 1e100, the first and last
+    recorded values being held out to the ends
+
+    :type raw_time: numpy.ndarray
+    :type raw_values: numpy.ndarray
+    :rtype: list[numpy.ndarray]
+    """
+
+    record_time = numpy.concatenate(([0], raw_time, [1e100]))
+    record_values = numpy.concatenate((raw_values[:1], raw_values, raw_values[-1:]))
+
+    return [record_time, record_values]
+
+
+def resampleTable(table, time_array, mode="linear"):
+
+    """
+    Resample the ( time x column ) values of an interpolation table onto time_array with one search shared by all the
+    columns, mode being one of Schemas.INTERPOLATION_MODES
+
+    :type table: list[numpy.ndarray]
+    :type time_array: numpy.ndarray
+    :type mode: str
+    :rtype: numpy.ndarray
+    """
+
+    [record_time, record_values] = table
+    last_record = len(record_time) - 1
+
+    if mode == "previous":
+
+        return record_values[numpy.clip(numpy.searchsorted(record_time, time_array, side='right') - 1, 0, last_record)]
+
+    if mode == "next":
+
+        return record_values[numpy.clip(numpy.searchsorted(record_time, time_array, side='left'), 0, last_record)]
+
+    upper = numpy.clip(numpy.searchsorted(record_time, time_array, side='right'), 1, last_record)
+    lower = upper - 1
+
+    lower_time = record_time[lower]
+    time_step = record_time[upper] - lower_time
+
+    if mode == "nearest":
+
+        nearest = numpy.where(time_array - lower_time <= time_step / 2, lower, upper)
+        return record_values[nearest]
+
+    zero_steps = time_step == 0
+
+    weights = numpy.where(zero_steps, 0.0, (time_array - lower_time) / numpy.where(zero_steps, 1.0, time_step))
+    weights = numpy.clip(weights, 0.0, 1.0)[:, numpy.newaxis]
+
+    lower_values = record_values[lower]
+
+    return lower_values + weights * (record_values[upper] - lower_values)
+
+
+class TimeSeries(object):
+
+    """
+    Resamples the columns of a time based data source onto arbitrary times. The data source hands over its columns as
+    float arrays through get_column, the series keeps the stacked interpolation tables of the most recently used column
+    sets. Shared by the csv and the SQLite backed data objects.
+
+    :type time_column: str
+    """
+
+    def __init__(self, time_column, get_column, schema=None, cache_size=TIME_SERIES_CACHE_SIZE):
+
+        """
+        :type get_column: (str) -> numpy.ndarray
+        :type schema: Schemas.FileSchema | None
+        :param schema: picks the interpolation mode of each column, linear for all of them without one
+        """
+
+        self.time_column = time_column
+        self._get_column = get_column
+        self._schema = schema
+        self._cache_size = cache_size
+
+        # [ padded times, padded ( time x column ) values ] keyed by the column names, least recently used first
+        self._tables = collections.OrderedDict()
+
+    def invalidate(self):
+
+        """
+        Forget the interpolation tables, called whenever a column of the data source changes
+        """
+
+        self._tables.clear()
+
+    def getInterpolationMode(self, column):
+
+        if self._schema is None:
+
+            return "linear"
+
+        return self._schema.getInterpolation(column)
+
+    def getInterpolationTable(self, columns):
+
+        """
+        The padded interpolation table of the columns stacked side by side, see padTable
+
+        :type columns: tuple[str]
+        :rtype: list[numpy.ndarray]
+        """
+
+        if columns in self._tables:
+
+            self._tables.move_to_end(columns)
+            return self._tables[columns]
+
+        raw_values = numpy.column_stack([ self._get_column(column) for column in columns ])
+        self._tables[columns] = padTable(self._get_column(self.time_column), raw_values)
+
+        while len(self._tables) > self._cache_size:
+
+            self._tables.popitem(last=False)
+
+        return self._tables[columns]
+
+    def interpolatedArray(self, time_array, columns):
+
+        """
+        Resample all the columns at once onto time_array, each column with its interpolation mode. Times outside of the
+        record take the nearest recorded value.
+
+        :type columns: list[str]
+        :rtype: numpy.ndarray
+        :return: ( time x column ) values in the order of columns
+        """
+
+        columns = [ column.strip() for column in columns ]
+        time_array = numpy.asarray(time_array, dtype=numpy.float64)
+
+        interpolated_values = numpy.empty((len(time_array), len(columns)))
+        modes = [ self.getInterpolationMode(column) for column in columns ]
+
+        # the columns sharing a mode are resampled together
+        for mode in set(modes):
+
+            indices = [ index for index in range(len(columns)) if modes[index] == mode ]
+            table = self.getInterpolationTable(tuple( columns[index] for index in indices ))
+
+            interpolated_values[:, indices] = resampleTable(table, time_array, mode)
+
+        return interpolated_values
+
+    def interpolatedData(self, time_array, columns):
+
+        """
+        :type columns: list[str]
+        :rtype: dict[str, numpy.ndarray]
+        :return: views into interpolatedArray keyed by the stripped column names
+        """
+
+        columns = list(columns)
+        interpolated_values = self.interpolatedArray(time_array, columns)
+
+        values = {}
+
+        for column_index in range(len(columns)):
+
+            values[columns[column_index].strip()] = interpolated_values[:, column_index]
+
+        return values
+
+    def getRawDataTimeSeries(self, column):
+
+        return [self._get_column(self.time_column), self._get_column(column)]
+
+    def getEndingTime(self):
+
+        return float(self._get_column(self.time_column)[-1])
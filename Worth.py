@@ -28,9 +28,6 @@ class WorthResults(CSVClasses.CSVDataObject):
 
         eigenvalues = self.getColumnData("K-eigenvalue")
 
-        temperature = [ float(value) for value in temperature ]
-        eigenvalues = [ float(value) for value in eigenvalues ]
-
         max_eigenvalue = max(eigenvalues)
         data = sorted(zip(eigenvalues, temperature))
         #limit the maximum temperature to 3300 K